@@ -0,0 +1,47 @@
+import functools
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from lescode.cache import memoize
+
+
+def target(x, y=1):
+    return x
+
+
+def calls(func):
+    return {
+        'f(1)': lambda: func(1),
+        'f(1, y=2)': lambda: func(1, y=2),
+        'f([1, 2])': lambda: func([1, 2]),
+    }
+
+
+def main():
+    variants = {
+        'memoize fast': memoize(target),
+        'memoize legacy': memoize(hash_generator=hash)(target),
+        'lru_cache': functools.lru_cache(maxsize=256)(target),
+    }
+
+    print('hit path, best mean per call of 5 runs')
+    for name, func in variants.items():
+        row = []
+        for label, call in calls(func).items():
+            try:
+                call()
+            except TypeError:
+                row.append(f'{label} -')
+                continue
+            timer = timeit.Timer(call)
+            number, _ = timer.autorange()
+            best = min(timer.repeat(repeat=5, number=number)) / number
+            row.append(f'{label} {best * 1e6:.2f}us')
+        print(f'  {name:<16}' + '   '.join(row))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+import itertools
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from lescode.cache.policies import arc, lfu, lru, make_policy, tinylfu
+from lescode.cache.types import Cache
+
+
+MAXSIZE = 1000
+REQUESTS = 200000
+ITEMS = 20000
+POLICIES = (lru, lfu, arc, tinylfu)
+
+
+def zipf(count:int, items:int, skew:float=0.9, seed:int=0):
+    weights = itertools.accumulate(1 / (i + 1) ** skew for i in range(items))
+    return random.Random(seed).choices(range(items), cum_weights=list(weights), k=count)
+
+
+def scans(count:int, items:int, every:int=2000, length:int=1500, seed:int=0):
+    trace, start = [], 10 ** 9
+    for i, key in enumerate(zipf(count, items, seed=seed)):
+        trace.append(key)
+        if i % every == 0:
+            trace.extend(range(start, start + length))
+            start += length
+    return trace
+
+
+def hit_ratio(policy, trace) -> float:
+    cache, hits = Cache(maxsize=MAXSIZE, policy=make_policy(policy, MAXSIZE)), 0
+    for timestamp, key in enumerate(trace):
+        if key in cache:
+            cache.get(key, timestamp)
+            hits += 1
+        else:
+            cache.put(key, key, timestamp)
+    return hits / len(trace)
+
+
+def main():
+    traces = {
+        'zipf(0.9)': zipf(REQUESTS, ITEMS),
+        'zipf + scans': scans(REQUESTS, ITEMS // 10),
+    }
+
+    print(f'hit ratio, maxsize={MAXSIZE}, {REQUESTS} requests')
+    print(' ' * 14 + ''.join(f'{policy.__name__:>9}' for policy in POLICIES))
+    for name, trace in traces.items():
+        print(f'  {name:<12}' + ''.join(f'{hit_ratio(policy, trace):>9.3f}' for policy in POLICIES))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+import random
+import sys
+import timeit
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import recursive_time
+from lescode.scheduler import time as compiled_time
+
+
+CALLS = 200
+SPECS = (
+    {'second': 40},
+    {'hour': (9, 12, 18), 'minute': (0, 30)},
+    {'second': ((0, 60, 5),)},
+    {'day': (1, 15), 'hour': 3},
+)
+
+
+def moments(count:int, seed:int=0):
+    rnd, start = random.Random(seed), datetime(2024, 1, 1)
+    return [start + timedelta(seconds=rnd.randrange(366 * 86400), microseconds=rnd.randrange(10 ** 6)) for _ in range(count)]
+
+
+def mean(get_next_runtime, spec, nows) -> float:
+    return timeit.timeit(lambda: [get_next_runtime(now, **spec) for now in nows], number=1) / len(nows)
+
+
+def main():
+    nows = moments(CALLS)
+    print(f'get_next_runtime, mean of {CALLS} calls')
+    print(f'  {"spec":<40}{"recursive":>10}{"compiled":>10}')
+    for spec in SPECS:
+        label = ', '.join(f'{key}={value}' for key, value in spec.items())
+        recursive = mean(recursive_time.get_next_runtime, spec, nows)
+        compiled = mean(compiled_time.get_next_runtime, spec, nows)
+        print(f'  {label:<40}{recursive * 1e6:>8.0f}us{compiled * 1e6:>8.0f}us')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from lescode.scheduler import Scheduler, call_after
+
+
+JOBS = 100000
+
+
+async def main():
+    loop = asyncio.get_running_loop()
+    scheduler = Scheduler(loop)
+    runs = [0]
+
+    start = time.perf_counter()
+    for i in range(JOBS):
+        @scheduler.schedule(call_after, repeated=True, seconds=0.05 + (i % 10) * 0.01)
+        async def job():
+            runs[0] += 1
+    registered = time.perf_counter() - start
+
+    start = time.perf_counter()
+    scheduler.ready()
+    ready = time.perf_counter() - start
+    queued, handles = len(scheduler.queue), len(loop._scheduled)
+
+    await asyncio.sleep(0.3)
+    fired = runs[0]
+
+    start = time.perf_counter()
+    for task in scheduler.tasks[::2]:
+        task.cancel()
+    canceled = time.perf_counter() - start
+
+    runs[0] = 0
+    await asyncio.sleep(0.3)
+    print(f'{JOBS} jobs')
+    print(f'  schedule    {registered:.2f}s')
+    print(f'  ready       {ready:.2f}s, {queued} queued, {handles} loop timer handles')
+    print(f'  first 0.3s  {fired} runs')
+    print(f'  cancel half {canceled:.2f}s, then {runs[0]} runs in 0.3s')
+
+    for task in scheduler.tasks:
+        task.cancel()
+
+    assert handles == 1, f"expected one loop timer handle, got {handles}"
+    assert fired > 0 and runs[0] > 0
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
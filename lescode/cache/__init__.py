@@ -1,2 +1,4 @@
-from .cache import memoize
-from .policies import fifo, lfu, lifo, lru, mru
+from .cache import make_key, memoize, memoize_batch
+from .policies import arc, fifo, lfu, lifo, lru, mru, tinylfu
+from .storage import SqliteCache
+from .types import Cache, CacheInfo, Storage
@@ -3,13 +3,15 @@ import functools
 import operator
 import time
 from collections.abc import Hashable
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from threading import Lock
 
 from typing import *
 from typing import Callable
 
-from ..functional import case, compose, curry, excepts, is_instance, map, mock
-from .policies import lru
-from .types import Cache, Number, Policy, State, Timer
+from ..functional import case, compose, excepts, is_instance, map, mock
+from .policies import lru, make_policy
+from .types import MISSING, Cache, CacheInfo, Mark, Number, Policy, Storage, Timer
 
 
 def generate_hash(generator:Callable[[Hashable], Hashable]):
@@ -36,66 +38,365 @@ def generate_hash(generator:Callable[[Hashable], Hashable]):
     return hash_func
 
 
-@curry
-def update_history(key:Hashable, value:Any, timestamp:Number, cache:Cache, maxsize:int, policy:Policy):
-    if len(cache.history) == maxsize:
-        deleted = policy(list(cache.history.values()))
-        cache.pop(deleted.key)
+class HashedKey(list):
 
-    current = State(key=key, earliest=timestamp, latest=timestamp)
-    cache.history[key] = current
-    cache.data[key] = value
+    __slots__ = 'hashvalue'
 
+    def __init__(self, values:Tuple[Hashable, ...]):
+        self[:] = values
+        self.hashvalue = hash(values)
 
-def __check_and_remove_outdated(hash_generator:Callable, cache:Cache, ttl:int, now:float, key:Hashable):
-    data, state = None, None
-    if ttl > 0 and key in cache.history and cache.history[key].earliest < now - ttl:
-        data, state = cache.pop(key)
+    def __hash__(self):
+        return self.hashvalue
 
-    return data, state
 
+__KWARGS_MARK = (Mark('kwargs'),)
+__FROZEN_MARK = (Mark('frozen'),)
+__FAST_TYPES = {int, str}
 
-def memoize(_func:Optional[Callable]=None, maxsize:int=256, ttl:Number=0, timer:Timer=time.time, policy:Policy=lru, hash_generator:Callable[[Hashable], Hashable]=hash, catch_exception:Optional[Type[Exception]]=None):
 
-    cache = Cache()
-    update_cache_history = update_history(cache=cache, maxsize=maxsize, policy=policy)
-    hash_generator = generate_hash(hash_generator)
+def freeze(value:Any) -> Hashable:
+    if type(value) in (list, tuple):
+        return (type(value), *(freeze(val) for val in value))
+
+    if isinstance(value, dict):
+        return dict, frozenset((key, freeze(val)) for key, val in value.items())
+
+    if isinstance(value, (set, frozenset)):
+        return frozenset, frozenset(freeze(val) for val in value)
+
+    if isinstance(value, Hashable):
+        try:
+            hash(value)
+            return value
+        except TypeError:
+            pass
+
+    return type(value), value.__repr__()
+
+
+def make_key(*args, **kwargs) -> Hashable:
+    key = args
+    if kwargs:
+        key += __KWARGS_MARK
+        for item in sorted(kwargs.items()):
+            key += item
+    elif len(key) == 1 and type(key[0]) in __FAST_TYPES:
+        return key[0]
+
+    try:
+        return HashedKey(key)
+    except TypeError:
+        return HashedKey(__FROZEN_MARK + freeze(key))
+
+
+def scope_key(key:Callable[..., Hashable], func:Callable) -> Callable[..., Hashable]:
+    name = f'{func.__module__}.{func.__qualname__}'
+
+    def scoped(*args, **kwargs):
+        return name, key(*args, **kwargs)
+
+    return scoped
+
+
+@functools.lru_cache()
+def refresher() -> Executor:
+    return ThreadPoolExecutor(thread_name_prefix='memoize-refresh')
+
+
+class NoLock:
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+# A supplied storage keeps its own maxsize, ttl and eviction policy; memoize only checks
+# that the arguments given explicitly agree with them. With stale-while-revalidate the
+# storage must keep entries for ttl + stale.
+def make_storage(storage:Optional[Storage], maxsize:Optional[int], ttl:Optional[Number], policy:Optional[Union[Policy, Callable]], stale:Number=0) -> Storage:
+    lifetime = ttl + stale if ttl and ttl > 0 else 0
+    if storage is None:
+        maxsize = 256 if maxsize is None else maxsize
+        return Cache(maxsize=maxsize, policy=make_policy(lru if policy is None else policy, maxsize), ttl=lifetime)
+
+    if maxsize is not None and maxsize != storage.maxsize:
+        raise Exception(f"maxsize={maxsize} conflicts with storage maxsize={storage.maxsize}")
+    if ttl is not None and lifetime != storage.ttl:
+        given = f"ttl={ttl} + stale={stale}" if stale else f"ttl={ttl}"
+        raise Exception(f"{given} conflicts with storage ttl={storage.ttl}")
+    if policy is not None and policy is not storage.policy:
+        raise Exception(f"policy {getattr(policy, '__name__', policy)} conflicts with the storage policy")
+    return storage
+
+
+def memoize(_func:Optional[Callable]=None, maxsize:Optional[int]=None, ttl:Optional[Number]=None, timer:Timer=time.time, policy:Optional[Union[Policy, Callable]]=None, hash_generator:Optional[Callable[[Hashable], Hashable]]=None, key:Callable[..., Hashable]=make_key, catch_exception:Optional[Type[Exception]]=None, concurrent:bool=False, storage:Optional[Storage]=None, reporter:Optional[Callable[[CacheInfo], Any]]=None, report_interval:Number=60, stale:Number=0, refresh_ahead:Number=0, refresh_threshold:int=2, executor:Optional[Executor]=None):
+
+    cache = make_storage(storage, maxsize, ttl, policy, stale)
+    ttl = ttl or 0
+    hash_generator = generate_hash(hash_generator) if hash_generator else key
+    revalidate = ttl > 0 and (stale > 0 or refresh_ahead > 0)
+    lock = Lock() if concurrent or revalidate else NoLock()
+    flights:Dict[Hashable, Future] = {}
+    refreshing:Dict[Hashable, Any] = {}
+    stats = cache.stats
+    reported = [timer()]
+
+    def lookup(key:Hashable, now:Number) -> Tuple[bool, Any, Optional[Future], bool]:
+        with lock:
+            data = None
+            if cache.expired(key, now):
+                data, _ = cache.pop(key)
+                stats.expirations += 1
+            cache.expire(now)
+
+            value = cache.get(key, now, MISSING)
+            if value is not MISSING:
+                stats.hits += 1
+                if revalidate and key not in refreshing and outdated(key, now):
+                    refreshing[key] = None
+                    return True, value, None, True
+                return True, value, None, False
+
+            if not concurrent:
+                stats.misses += 1
+                return False, data, None, True
+
+            flight = flights.get(key)
+            if flight is None:
+                stats.misses += 1
+                flight = flights[key] = Future()
+                return False, data, flight, True
+
+            stats.hits += 1
+            return False, data, flight, False
+
+    def outdated(key:Hashable, now:Number) -> bool:
+        state = cache.peek(key)
+        if state is None:
+            return False
+
+        age = now - state.earliest
+        if age > ttl:
+            return stale > 0
+        return refresh_ahead > 0 and age > ttl - refresh_ahead and state.count >= refresh_threshold
+
+    def report(now:Number):
+        if now - reported[0] >= report_interval:
+            reported[0] = now
+            reporter(cache_info())
+
+    def cache_info() -> CacheInfo:
+        with lock:
+            return cache.info()
+
+    def land(key:Hashable, flight:Optional[Future], now:Number, latency:float, value:Any=None, error:Optional[BaseException]=None):
+        try:
+            with lock:
+                stats.record(latency)
+                if flight is not None:
+                    flights.pop(key, None)
+                if error is None:
+                    cache.put(key, value, now)
+        except BaseException as e:
+            error = e
+            raise e
+        finally:
+            if flight is not None:
+                if error is None:
+                    flight.set_result(value)
+                elif isinstance(error, asyncio.CancelledError):
+                    flight.cancel()
+                else:
+                    flight.set_exception(error)
+
+    def settle(key:Hashable, *args):
+        with lock:
+            refreshing.pop(key, None)
 
     def decorator(func:Callable):
+        hash_key = scope_key(hash_generator, func) if storage is not None else hash_generator
 
         if asyncio.iscoroutinefunction(func):
+            async def refresh(key:Hashable, *args, **kwargs):
+                now, start = timer(), time.perf_counter()
+                value = await func(*args, **kwargs)
+                land(key, None, now, time.perf_counter() - start, value=value)
+
             async def wrapper(*args, **kwargs):
-                now = timer()
-                key = hash_generator(*args, **kwargs)
-                data, _ = __check_and_remove_outdated(hash_generator, cache, ttl, now, key)
+                key = hash_key(*args, **kwargs)
+                while True:
+                    now = timer()
+                    found, data, flight, leader = lookup(key, now)
+                    if reporter is not None:
+                        report(now)
+
+                    if found:
+                        if leader:
+                            with lock:
+                                task = refreshing[key] = asyncio.ensure_future(refresh(key, *args, **kwargs))
+                            task.add_done_callback(functools.partial(settle, key))
+                        return data
+
+                    if leader:
+                        break
 
-                if key not in cache.data:
+                    try:
+                        return await asyncio.shield(asyncio.wrap_future(flight))
+                    except asyncio.CancelledError:
+                        if not flight.cancelled():
+                            raise
+
+                start = time.perf_counter()
+                try:
                     value = await excepts(func, catch_exception, mock(data))(*args, **kwargs)
-                    update_cache_history(key, value, now)
-                else:
-                    cache.history[key].latest = now
-                    cache.history[key].count += 1
+                except BaseException as e:
+                    land(key, flight, now, time.perf_counter() - start, error=e)
+                    raise e
 
-                return cache.data[key]
+                land(key, flight, now, time.perf_counter() - start, value=value)
+                return value
         else:
+            def refresh(key:Hashable, *args, **kwargs):
+                now, start = timer(), time.perf_counter()
+                value = func(*args, **kwargs)
+                land(key, None, now, time.perf_counter() - start, value=value)
+
             def wrapper(*args, **kwargs):
                 now = timer()
-                key = hash_generator(*args, **kwargs)
-                data, _ = __check_and_remove_outdated(hash_generator, cache, ttl, now, key)
+                key = hash_key(*args, **kwargs)
+                found, data, flight, leader = lookup(key, now)
+                if reporter is not None:
+                    report(now)
+
+                if found:
+                    if leader:
+                        with lock:
+                            task = refreshing[key] = (executor or refresher()).submit(refresh, key, *args, **kwargs)
+                        task.add_done_callback(functools.partial(settle, key))
+                    return data
+
+                if not leader:
+                    return flight.result()
 
-                if key not in cache.data:
+                start = time.perf_counter()
+                try:
                     value = excepts(func, catch_exception, mock(data))(*args, **kwargs)
-                    update_cache_history(key, value, now)
-                else:
-                    cache.history[key].latest = now
-                    cache.history[key].count += 1
+                except BaseException as e:
+                    land(key, flight, now, time.perf_counter() - start, error=e)
+                    raise e
 
-                return cache.data[key]
+                land(key, flight, now, time.perf_counter() - start, value=value)
+                return value
 
         def uncache(*args, **kwargs):
-            cache.pop(hash_generator(*args, **kwargs))
+            with lock:
+                cache.pop(hash_key(*args, **kwargs))
+
+        def expire():
+            with lock:
+                return cache.expire(timer())
+
+        setattr(wrapper, 'uncache', uncache)
+        setattr(wrapper, 'expire', expire)
+        setattr(wrapper, 'cache_info', cache_info)
+        setattr(wrapper, 'nocache', func)
+        return functools.wraps(func)(wrapper)
+
+    if _func:
+        return decorator(_func)
+
+    return decorator
+
+
+def memoize_batch(_func:Optional[Callable]=None, maxsize:Optional[int]=None, ttl:Optional[Number]=None, timer:Timer=time.time, policy:Optional[Union[Policy, Callable]]=None, key:Callable[..., Hashable]=make_key, concurrent:bool=False, storage:Optional[Storage]=None):
+
+    cache = make_storage(storage, maxsize, ttl, policy)
+    lock = Lock() if concurrent else NoLock()
+    stats = cache.stats
+
+    def split(item_key:Callable[..., Hashable], items:Iterable[Hashable], now:Number, *args, **kwargs) -> Tuple[List[Any], Dict[Hashable, List[int]], List[Hashable]]:
+        results, missing, pending = [], {}, []
+        with lock:
+            cache.expire(now)
+            for i, item in enumerate(items):
+                _key = item_key(item, *args, **kwargs)
+                if cache.expired(_key, now):
+                    cache.pop(_key)
+                    stats.expirations += 1
+
+                value = cache.get(_key, now, MISSING)
+                results.append(value)
+                if value is not MISSING:
+                    stats.hits += 1
+                    continue
+
+                if _key not in missing:
+                    stats.misses += 1
+                    missing[_key] = []
+                    pending.append(item)
+                missing[_key].append(i)
+
+        return results, missing, pending
+
+    def merge(results:List[Any], missing:Dict[Hashable, List[int]], pending:List[Hashable], values:Union[Sequence[Any], Mapping[Hashable, Any]], now:Number, latency:float) -> List[Any]:
+        if isinstance(values, Mapping):
+            values = [values[item] for item in pending]
+
+        if len(values) != len(pending):
+            raise Exception(f"expected {len(pending)} values, got {len(values)}")
+
+        with lock:
+            stats.record(latency)
+            for (_key, indexes), value in zip(missing.items(), values):
+                cache.put(_key, value, now)
+                for i in indexes:
+                    results[i] = value
+
+        return results
+
+    def decorator(func:Callable):
+        item_key = scope_key(key, func) if storage is not None else key
+
+        if asyncio.iscoroutinefunction(func):
+            async def wrapper(items:Iterable[Hashable], *args, **kwargs):
+                now = timer()
+                results, missing, pending = split(item_key, items, now, *args, **kwargs)
+                if not pending:
+                    return results
+
+                start = time.perf_counter()
+                values = await func(pending, *args, **kwargs)
+                return merge(results, missing, pending, values, now, time.perf_counter() - start)
+        else:
+            def wrapper(items:Iterable[Hashable], *args, **kwargs):
+                now = timer()
+                results, missing, pending = split(item_key, items, now, *args, **kwargs)
+                if not pending:
+                    return results
+
+                start = time.perf_counter()
+                values = func(pending, *args, **kwargs)
+                return merge(results, missing, pending, values, now, time.perf_counter() - start)
+
+        def uncache(items:Iterable[Hashable], *args, **kwargs):
+            with lock:
+                for item in items:
+                    cache.pop(item_key(item, *args, **kwargs))
+
+        def expire():
+            with lock:
+                return cache.expire(timer())
+
+        def cache_info() -> CacheInfo:
+            with lock:
+                return cache.info()
 
         setattr(wrapper, 'uncache', uncache)
+        setattr(wrapper, 'expire', expire)
+        setattr(wrapper, 'cache_info', cache_info)
         setattr(wrapper, 'nocache', func)
         return functools.wraps(func)(wrapper)
 
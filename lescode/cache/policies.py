@@ -1,9 +1,300 @@
-import operator
-from ..functional import compose, peek_nth, sort
+from collections import OrderedDict
+from typing import *
+from typing import Callable
 
+from .types import Policy, State
 
-fifo = compose(peek_nth(0), sort(key=operator.attrgetter('earliest')))
-lifo = compose(peek_nth(0), reversed, sort(key=operator.attrgetter('earliest')))
-lru = compose(peek_nth(0), sort(key=operator.attrgetter('latest')))
-mru = compose(peek_nth(0), reversed, sort(key=operator.attrgetter('latest')))
-lfu = compose(peek_nth(0), sort(key=operator.attrgetter('count')))
\ No newline at end of file
+
+def ring(count:int=0) -> State:
+    head = State(None, count=count)
+    head.prev = head.next = head
+    return head
+
+
+def link(head:State, state:State):
+    tail = head.prev
+    state.prev, state.next = tail, head
+    tail.next = head.prev = state
+
+
+def unlink(state:State):
+    state.prev.next = state.next
+    state.next.prev = state.prev
+    state.prev = state.next = None
+
+
+class Order(Policy):
+
+    def __init__(self, recency:bool=False, last:bool=False):
+        self.recency:bool = recency
+        self.last:bool = last
+        self.head:State = ring()
+
+    def add(self, state:State):
+        link(self.head, state)
+
+    def touch(self, state:State):
+        if self.recency:
+            unlink(state)
+            link(self.head, state)
+
+    def remove(self, state:State):
+        if state.prev is not None:
+            unlink(state)
+
+    def evict(self, key:Hashable) -> Hashable:
+        deleted = self.head.prev if self.last else self.head.next
+        unlink(deleted)
+        return deleted.key
+
+
+class Frequency(Policy):
+
+    def __init__(self):
+        self.buckets:Dict[int, State] = {}
+        self.minimum:int = 0
+
+    def __link(self, state:State):
+        head = self.buckets.get(state.count)
+        if head is None:
+            head = self.buckets[state.count] = ring(state.count)
+        link(head, state)
+
+    def __unlink(self, state:State, count:int):
+        if state.prev is state.next:
+            del self.buckets[count]
+        unlink(state)
+
+    def add(self, state:State):
+        self.__link(state)
+        if len(self.buckets) == 1 or state.count < self.minimum:
+            self.minimum = state.count
+
+    def touch(self, state:State):
+        count = state.count - 1
+        self.__unlink(state, count)
+        if count == self.minimum and count not in self.buckets:
+            self.minimum = state.count
+        self.__link(state)
+
+    def remove(self, state:State):
+        if state.prev is not None:
+            self.__unlink(state, state.count)
+
+    def evict(self, key:Hashable) -> Hashable:
+        if self.minimum not in self.buckets:
+            self.minimum = min(self.buckets)
+
+        deleted = self.buckets[self.minimum].next
+        self.__unlink(deleted, self.minimum)
+        return deleted.key
+
+
+class Sorted(Policy):
+
+    def __init__(self, select:Callable[[List[State]], State]):
+        self.select = select
+        self.states:Dict[Hashable, State] = {}
+
+    def add(self, state:State):
+        self.states[state.key] = state
+
+    def remove(self, state:State):
+        self.states.pop(state.key, None)
+
+    def evict(self, key:Hashable) -> Hashable:
+        return self.states.pop(self.select(list(self.states.values())).key).key
+
+
+class Adaptive(Policy):
+
+    def __init__(self, maxsize:int):
+        self.maxsize:int = maxsize
+        self.target:float = 0
+        self.recent:OrderedDict = OrderedDict()
+        self.frequent:OrderedDict = OrderedDict()
+        self.recent_ghosts:OrderedDict = OrderedDict()
+        self.frequent_ghosts:OrderedDict = OrderedDict()
+        self.adapted:bool = False
+
+    def __adapt(self, key:Hashable):
+        if key in self.recent_ghosts:
+            delta = max(len(self.frequent_ghosts) / len(self.recent_ghosts), 1)
+            self.target = min(self.target + delta, self.maxsize)
+        elif key in self.frequent_ghosts:
+            delta = max(len(self.recent_ghosts) / len(self.frequent_ghosts), 1)
+            self.target = max(self.target - delta, 0)
+
+    def add(self, state:State):
+        key = state.key
+        if not self.adapted:
+            self.__adapt(key)
+        self.adapted = False
+
+        if key in self.recent_ghosts or key in self.frequent_ghosts:
+            self.recent_ghosts.pop(key, None)
+            self.frequent_ghosts.pop(key, None)
+            self.frequent[key] = None
+        else:
+            self.recent[key] = None
+
+        while self.recent_ghosts and len(self.recent) + len(self.recent_ghosts) > self.maxsize:
+            self.recent_ghosts.popitem(last=False)
+
+        while self.frequent_ghosts and len(self.recent) + len(self.frequent) + len(self.recent_ghosts) + len(self.frequent_ghosts) > 2 * self.maxsize:
+            self.frequent_ghosts.popitem(last=False)
+
+    def touch(self, state:State):
+        key = state.key
+        if key in self.recent:
+            del self.recent[key]
+            self.frequent[key] = None
+        else:
+            self.frequent.move_to_end(key)
+
+    def remove(self, state:State):
+        self.recent.pop(state.key, None)
+        self.frequent.pop(state.key, None)
+
+    def evict(self, key:Hashable) -> Hashable:
+        self.__adapt(key)
+        self.adapted = True
+
+        size = len(self.recent)
+        if self.recent and (size > self.target or (size == self.target and key in self.frequent_ghosts) or not self.frequent):
+            deleted, _ = self.recent.popitem(last=False)
+            self.recent_ghosts[deleted] = None
+        else:
+            deleted, _ = self.frequent.popitem(last=False)
+            self.frequent_ghosts[deleted] = None
+
+        return deleted
+
+
+class Sketch:
+
+    SEEDS = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0xD6E8FEB86659FD93)
+
+    def __init__(self, maxsize:int):
+        self.width:int = 1 << max(4, (max(maxsize, 1) - 1).bit_length())
+        self.mask:int = self.width - 1
+        self.table:bytearray = bytearray(self.width * len(self.SEEDS))
+        self.additions:int = 0
+        self.sample:int = 10 * max(maxsize, 1)
+
+    def __indexes(self, key:Hashable) -> Iterator[int]:
+        value = hash(key)
+        for i, seed in enumerate(self.SEEDS):
+            yield i * self.width + (((value ^ seed) * seed) >> 17 & self.mask)
+
+    def increment(self, key:Hashable):
+        table = self.table
+        for index in self.__indexes(key):
+            if table[index] < 15:
+                table[index] += 1
+
+        self.additions += 1
+        if self.additions >= self.sample:
+            self.reset()
+
+    def frequency(self, key:Hashable) -> int:
+        return min(self.table[index] for index in self.__indexes(key))
+
+    def reset(self):
+        self.table = bytearray(value >> 1 for value in self.table)
+        self.additions //= 2
+
+
+class TinyFrequency(Policy):
+
+    def __init__(self, maxsize:int, window:float=0.01, protected:float=0.8):
+        main = max(maxsize - max(1, int(maxsize * window)), 1)
+        self.window_size:int = max(1, int(maxsize * window))
+        self.protected_size:int = max(1, int(main * protected))
+        self.sketch:Sketch = Sketch(maxsize)
+        self.window:OrderedDict = OrderedDict()
+        self.probation:OrderedDict = OrderedDict()
+        self.protected:OrderedDict = OrderedDict()
+
+    def add(self, state:State):
+        self.sketch.increment(state.key)
+        self.window[state.key] = None
+        if len(self.window) > self.window_size:
+            key, _ = self.window.popitem(last=False)
+            self.probation[key] = None
+
+    def touch(self, state:State):
+        key = state.key
+        self.sketch.increment(key)
+        if key in self.window:
+            self.window.move_to_end(key)
+        elif key in self.probation:
+            del self.probation[key]
+            self.protected[key] = None
+            if len(self.protected) > self.protected_size:
+                demoted, _ = self.protected.popitem(last=False)
+                self.probation[demoted] = None
+        else:
+            self.protected.move_to_end(key)
+
+    def remove(self, state:State):
+        self.window.pop(state.key, None)
+        self.probation.pop(state.key, None)
+        self.protected.pop(state.key, None)
+
+    def evict(self, key:Hashable) -> Hashable:
+        main = self.probation or self.protected
+        if len(self.window) < self.window_size or not main:
+            if main:
+                return main.popitem(last=False)[0]
+            return self.window.popitem(last=False)[0]
+
+        candidate, _ = self.window.popitem(last=False)
+        victim = next(iter(main))
+        if self.sketch.frequency(candidate) > self.sketch.frequency(victim):
+            del main[victim]
+            self.probation[candidate] = None
+            return victim
+
+        return candidate
+
+
+def fifo(maxsize:int=0) -> Policy:
+    return Order(recency=False, last=False)
+
+
+def lifo(maxsize:int=0) -> Policy:
+    return Order(recency=False, last=True)
+
+
+def lru(maxsize:int=0) -> Policy:
+    return Order(recency=True, last=False)
+
+
+def mru(maxsize:int=0) -> Policy:
+    return Order(recency=True, last=True)
+
+
+def lfu(maxsize:int=0) -> Policy:
+    return Frequency()
+
+
+def arc(maxsize:int=0) -> Policy:
+    return Adaptive(maxsize)
+
+
+def tinylfu(maxsize:int=0) -> Policy:
+    return TinyFrequency(maxsize)
+
+
+def make_policy(policy:Union[Policy, Callable], maxsize:int=0) -> Policy:
+    if isinstance(policy, Policy):
+        return policy
+
+    if policy in (fifo, lifo, lru, mru, lfu, arc, tinylfu):
+        return policy(maxsize)
+
+    if isinstance(policy, type) and issubclass(policy, Policy):
+        return policy()
+
+    return Sorted(policy)
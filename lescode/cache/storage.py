@@ -0,0 +1,188 @@
+import datetime
+import os
+import sqlite3
+from decimal import Decimal
+from enum import Enum
+from pathlib import Path, PurePath
+from threading import Lock
+from typing import *
+from typing import Callable
+from uuid import UUID
+
+from msgpack import ExtType, packb, unpackb
+
+from ..types.base import get_datetime_decoder, get_datetime_encoder
+from .policies import fifo, lfu, lifo, lru, mru
+from .types import Mark, Number, State, Stats, Storage
+
+
+ORDERS = {
+    fifo: 'earliest ASC',
+    lifo: 'earliest DESC',
+    lru: 'latest ASC',
+    mru: 'latest DESC',
+    lfu: 'count ASC, earliest ASC',
+}
+
+
+STABLE = (datetime.date, datetime.time, datetime.timedelta, Decimal, Enum, PurePath, UUID)
+
+
+def pack_key(obj:Any) -> Any:
+    if isinstance(obj, Mark):
+        return ExtType(1, obj.name.encode())
+    if isinstance(obj, type):
+        return ExtType(2, f'{obj.__module__}.{obj.__qualname__}'.encode())
+    if isinstance(obj, (set, frozenset)):
+        return ExtType(3, packb(sorted(obj, key=repr), default=pack_key, use_bin_type=True))
+    if isinstance(obj, STABLE):
+        return ExtType(4, f'{type(obj).__module__}.{type(obj).__qualname__}:{obj!r}'.encode())
+    raise TypeError(f"{type(obj).__name__} has no stable sqlite cache key, pass memoize a key function that returns one")
+
+
+class SqliteCache(Storage):
+
+    def __init__(self, path:Union[str, Path], maxsize:int=0, ttl:Number=0, policy:Callable=lru, table:str='cache', timeout:float=30, sweep:Number=1, mmap_size:int=1 << 28, dumps:Optional[Callable[[Any], bytes]]=None, loads:Optional[Callable[[bytes], Any]]=None):
+        if policy not in ORDERS:
+            raise Exception(f"policy {getattr(policy, '__name__', policy)} is not supported by sqlite storage")
+
+        self.path:str = str(path)
+        self.maxsize:int = maxsize
+        self.ttl:Number = ttl
+        self.policy:Callable = policy
+        self.order:str = ORDERS[policy]
+        self.table:str = table
+        self.timeout:float = timeout
+        self.sweep:Number = sweep
+        self.mmap_size:int = mmap_size
+        self.dumps:Callable[[Any], bytes] = dumps or (lambda value: packb(value, default=get_datetime_encoder(), use_bin_type=True))
+        self.loads:Callable[[bytes], Any] = loads or (lambda dump: unpackb(dump, object_hook=get_datetime_decoder(), raw=False))
+        self.lock:Lock = Lock()
+        self.stats:Stats = Stats()
+        self.swept:Number = float('-inf')
+        self.__pid:Optional[int] = None
+        self.__connection:Optional[sqlite3.Connection] = None
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self.__pid != os.getpid():
+            columns = [order.split()[0] for order in self.order.split(', ')]
+            connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(f'PRAGMA mmap_size={self.mmap_size}')
+            connection.executescript(f'''
+                CREATE TABLE IF NOT EXISTS "{self.table}" (
+                    key BLOB PRIMARY KEY, value BLOB, count INTEGER, earliest REAL, latest REAL
+                );
+                CREATE TABLE IF NOT EXISTS "{self.table}_size" (id INTEGER PRIMARY KEY CHECK (id = 0), size INTEGER);
+                INSERT OR IGNORE INTO "{self.table}_size" VALUES (0, 0);
+                CREATE TRIGGER IF NOT EXISTS "{self.table}_insert" AFTER INSERT ON "{self.table}"
+                    BEGIN UPDATE "{self.table}_size" SET size = size + 1; END;
+                CREATE TRIGGER IF NOT EXISTS "{self.table}_delete" AFTER DELETE ON "{self.table}"
+                    BEGIN UPDATE "{self.table}_size" SET size = size - 1; END;
+                CREATE INDEX IF NOT EXISTS "{self.table}_earliest" ON "{self.table}" (earliest);
+                CREATE INDEX IF NOT EXISTS "{self.table}_{'_'.join(columns)}" ON "{self.table}" ({', '.join(columns)});
+            ''')
+            self.__pid, self.__connection = os.getpid(), connection
+
+        return self.__connection
+
+    def encode(self, key:Hashable) -> bytes:
+        return packb(key, default=pack_key, use_bin_type=True)
+
+    def __contains__(self, key:Hashable) -> bool:
+        with self.lock:
+            row = self.connection.execute(f'SELECT 1 FROM "{self.table}" WHERE key = ?', (self.encode(key),)).fetchone()
+        return row is not None
+
+    def __len__(self) -> int:
+        with self.lock:
+            return self.connection.execute(f'SELECT size FROM "{self.table}_size"').fetchone()[0]
+
+    def get(self, key:Hashable, timestamp:Number, default:Any=None) -> Any:
+        key = self.encode(key)
+        with self.lock:
+            connection = self.connection
+            row = connection.execute(f'SELECT value FROM "{self.table}" WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return default
+            connection.execute(f'UPDATE "{self.table}" SET count = count + 1, latest = ? WHERE key = ?', (float(timestamp), key))
+
+        return self.loads(row[0])
+
+    def put(self, key:Hashable, value:Any, timestamp:Number):
+        dump, timestamp = self.dumps(value), float(timestamp)
+        with self.lock:
+            connection = self.connection
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                connection.execute(
+                    f'''INSERT INTO "{self.table}" VALUES (?, ?, 1, ?, ?) ON CONFLICT(key) DO UPDATE
+                        SET value = excluded.value, count = 1, earliest = excluded.earliest, latest = excluded.latest''',
+                    (self.encode(key), dump, timestamp, timestamp)
+                )
+                if self.maxsize > 0:
+                    size = connection.execute(f'SELECT size FROM "{self.table}_size"').fetchone()[0]
+                    if size > self.maxsize:
+                        self.stats.evictions += connection.execute(
+                            f'DELETE FROM "{self.table}" WHERE key IN (SELECT key FROM "{self.table}" ORDER BY {self.order} LIMIT ?)',
+                            (size - self.maxsize,)
+                        ).rowcount
+                connection.execute('COMMIT')
+            except BaseException as e:
+                connection.execute('ROLLBACK')
+                raise e
+
+    def pop(self, value:Hashable) -> Tuple[Any, State]:
+        key = self.encode(value)
+        with self.lock:
+            connection = self.connection
+            row = connection.execute(f'SELECT value, count, earliest, latest FROM "{self.table}" WHERE key = ?', (key,)).fetchone()
+            if row is not None:
+                connection.execute(f'DELETE FROM "{self.table}" WHERE key = ?', (key,))
+
+        if row is None:
+            raise KeyError(value)
+
+        data = self.loads(row[0])
+        return data, State(value, data, row[1], row[2], row[3])
+
+    def peek(self, key:Hashable) -> Optional[State]:
+        with self.lock:
+            row = self.connection.execute(f'SELECT count, earliest, latest FROM "{self.table}" WHERE key = ?', (self.encode(key),)).fetchone()
+
+        if row is None:
+            return None
+        return State(key, None, row[0], row[1], row[2])
+
+    def expired(self, key:Hashable, now:Number) -> bool:
+        if self.ttl <= 0:
+            return False
+
+        with self.lock:
+            row = self.connection.execute(
+                f'SELECT 1 FROM "{self.table}" WHERE key = ? AND earliest < ?',
+                (self.encode(key), float(now - self.ttl))
+            ).fetchone()
+        return row is not None
+
+    def expire(self, now:Number) -> int:
+        if self.ttl <= 0 or now < self.swept + self.sweep:
+            return 0
+
+        with self.lock:
+            self.swept = now
+            count = self.connection.execute(f'DELETE FROM "{self.table}" WHERE earliest < ?', (float(now - self.ttl),)).rowcount
+
+        self.stats.expirations += count
+        return count
+
+    def nbytes(self) -> int:
+        with self.lock:
+            connection = self.connection
+            return connection.execute('PRAGMA page_count').fetchone()[0] * connection.execute('PRAGMA page_size').fetchone()[0]
+
+    def clear(self):
+        with self.lock:
+            self.connection.execute(f'DELETE FROM "{self.table}"')
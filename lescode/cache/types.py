@@ -1,3 +1,8 @@
+import heapq
+import itertools
+import sys
+from abc import ABC, abstractmethod
+from collections import deque
 from decimal import Decimal
 from typing import *
 from typing import Callable
@@ -9,21 +14,215 @@ Timer = Callable[[], Number]
 
 class State:
 
-    def __init__(self, key:Hashable, count:int=1, earliest:Number=0, latest:Number=0):
+    __slots__ = ('key', 'value', 'count', 'earliest', 'latest', 'size', 'prev', 'next')
+
+    def __init__(self, key:Hashable, value:Any=None, count:int=1, earliest:Number=0, latest:Number=0, size:int=0):
         self.key:Hashable = key
+        self.value:Any = value
+        self.size:int = size
         self.count:int = count
         self.earliest:Number = earliest
         self.latest:Number = latest
+        self.prev:Optional[State] = None
+        self.next:Optional[State] = None
+
+
+class Policy(ABC):
+
+    @abstractmethod
+    def add(self, state:State):
+        raise NotImplementedError
+
+    def touch(self, state:State):
+        pass
+
+    @abstractmethod
+    def remove(self, state:State):
+        raise NotImplementedError
+
+    @abstractmethod
+    def evict(self, key:Hashable) -> Hashable:
+        raise NotImplementedError
+
+
+class CacheInfo(NamedTuple):
+    hits:int
+    misses:int
+    evictions:int
+    expirations:int
+    maxsize:int
+    currsize:int
+    bytes:int
+    latency:float
+    p50:float
+    p90:float
+    p99:float
+
+
+class Stats:
+
+    __slots__ = ('hits', 'misses', 'evictions', 'expirations', 'bytes', 'latency', 'samples')
+
+    def __init__(self, window:int=1024):
+        self.hits:int = 0
+        self.misses:int = 0
+        self.evictions:int = 0
+        self.expirations:int = 0
+        self.bytes:int = 0
+        self.latency:float = 0
+        self.samples:Deque[float] = deque(maxlen=window)
+
+    def record(self, latency:float):
+        self.latency += latency
+        self.samples.append(latency)
+
+    def percentile(self, samples:List[float], rank:float) -> float:
+        if not samples:
+            return 0
+        return samples[min(len(samples) - 1, int(rank * len(samples)))]
+
+    def info(self, maxsize:int, currsize:int, nbytes:int) -> CacheInfo:
+        samples = sorted(self.samples)
+        return CacheInfo(
+            hits=self.hits, misses=self.misses, evictions=self.evictions, expirations=self.expirations,
+            maxsize=maxsize, currsize=currsize, bytes=nbytes,
+            latency=self.latency / self.misses if self.misses else 0,
+            p50=self.percentile(samples, 0.5), p90=self.percentile(samples, 0.9), p99=self.percentile(samples, 0.99)
+        )
+
+
+MISSING = object()
+
+
+class Mark:
+
+    __slots__ = ('name',)
+
+    def __init__(self, name:str):
+        self.name:str = name
+
+    def __repr__(self) -> str:
+        return f'<{self.name}>'
+
+
+class Storage(ABC):
+
+    maxsize:int = 0
+    ttl:Number = 0
+    policy:Optional[Union[Policy, Callable]] = None
+    stats:Stats
+
+    @abstractmethod
+    def __contains__(self, key:Hashable) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    @abstractmethod
+    def get(self, key:Hashable, timestamp:Number, default:Any=None) -> Any:
+        raise NotImplementedError
+
+    @abstractmethod
+    def put(self, key:Hashable, value:Any, timestamp:Number):
+        raise NotImplementedError
+
+    @abstractmethod
+    def pop(self, value:Hashable) -> Tuple[Any, State]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def peek(self, key:Hashable) -> Optional[State]:
+        raise NotImplementedError
+
+    def expired(self, key:Hashable, now:Number) -> bool:
+        return False
+
+    def expire(self, now:Number) -> int:
+        return 0
+
+    def nbytes(self) -> int:
+        return self.stats.bytes
+
+    def info(self) -> CacheInfo:
+        return self.stats.info(self.maxsize, len(self), self.nbytes())
+
+
+class Cache(Storage):
+
+    def __init__(self, maxsize:int=0, policy:Optional[Policy]=None, ttl:Number=0):
+        self.entries:Dict[Hashable, State] = {}
+        self.maxsize:int = maxsize
+        self.policy:Optional[Policy] = policy
+        self.ttl:Number = ttl
+        self.deadlines:List[Tuple[Number, int, Hashable]] = []
+        self.sequence:Iterator[int] = itertools.count()
+        self.stats:Stats = Stats()
+
+    def __contains__(self, key:Hashable):
+        return key in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key:Hashable, timestamp:Number, default:Any=None) -> Any:
+        state = self.entries.get(key)
+        if state is None:
+            return default
+
+        state.latest = timestamp
+        state.count += 1
+        if self.policy:
+            self.policy.touch(state)
+        return state.value
+
+    def peek(self, key:Hashable) -> Optional[State]:
+        return self.entries.get(key)
+
+    def put(self, key:Hashable, value:Any, timestamp:Number):
+        if key in self.entries:
+            self.pop(key)
+
+        if self.policy and 0 < self.maxsize <= len(self.entries):
+            deleted = self.entries.pop(self.policy.evict(key))
+            self.stats.bytes -= deleted.size
+            self.stats.evictions += 1
+
+        state = State(key, value, 1, timestamp, timestamp, sys.getsizeof(value))
+        self.entries[key] = state
+        self.stats.bytes += state.size
+        if self.policy:
+            self.policy.add(state)
 
+        if self.ttl > 0:
+            heapq.heappush(self.deadlines, (timestamp + self.ttl, next(self.sequence), key))
+            if len(self.deadlines) > 2 * len(self.entries) + 64:
+                self.compact()
 
-Policy = Callable[[List[State]], State]
+    def expired(self, key:Hashable, now:Number) -> bool:
+        state = self.entries.get(key)
+        return self.ttl > 0 and state is not None and state.earliest < now - self.ttl
 
+    def expire(self, now:Number) -> int:
+        count = 0
+        while self.deadlines and self.deadlines[0][0] < now:
+            deadline, _, key = heapq.heappop(self.deadlines)
+            state = self.entries.get(key)
+            if state is not None and state.earliest + self.ttl == deadline:
+                self.pop(key)
+                count += 1
 
-class Cache:
+        self.stats.expirations += count
+        return count
 
-    def __init__(self):
-        self.history:Dict[Hashable, State] = {}
-        self.data:Dict[Hashable, Any] = {}
+    def compact(self):
+        self.deadlines = [(state.earliest + self.ttl, next(self.sequence), key) for key, state in self.entries.items()]
+        heapq.heapify(self.deadlines)
 
     def pop(self, value:Hashable):
-        return self.data.pop(value), self.history.pop(value)
+        state = self.entries.pop(value)
+        self.stats.bytes -= state.size
+        if self.policy:
+            self.policy.remove(state)
+        return state.value, state
@@ -1 +1,2 @@
-from .pool import Config, get_config, load_config
+from .pool import Accessor, Config, Subscription, get_config, load_config
+from .watcher import FileWatcher, get_watcher
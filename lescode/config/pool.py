@@ -1,55 +1,258 @@
 import asyncio
+import hashlib
+import io
 import json
 import logging
+import mmap
+import os
 import time
+from concurrent.futures import Future
 from datetime import timedelta
 from functools import partial, lru_cache
 from pathlib import Path
-from threading import Thread
+from threading import Lock, Thread, Timer
 from time import sleep
 from typing import *
 from typing import Callable
 
-from yaml import Loader, load
+from msgpack import packb, unpackb
+from yaml import load
 
-from ..functional import partial_update
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from ..functional import ensure_coroutine
 from ..scheduler import call_after
-from ..namespace import BaseNamespace, asclass, asdict, read
+from ..namespace import BaseNamespace, asclass, merge, read, writes
+from .watcher import get_watcher
 
 
 def load_yaml(stream):
-    return load(stream, Loader=Loader) or {}
+    return load(stream, Loader=SafeLoader) or {}
+
+
+def load_json(stream):
+    return orjson.loads(stream.read()) if orjson else json.load(stream)
+
+
+def load_msgpack(stream):
+    return unpackb(stream.read(), raw=False, strict_map_key=False) or {}
 
 
 LOADER = {
-    '.json': json.load,
+    '.json': load_json,
     '.yaml': load_yaml,
-    '.yml': load_yaml
+    '.yml': load_yaml,
+    '.msgpack': load_msgpack
 }
 
+
+def parse(path:Path, content:bytes, cache:bool=False) -> Dict[Hashable, Any]:
+    loader = LOADER.get(path.suffix)
+    if loader is None:
+        raise Exception(f"file format {path.suffix} is not supported")
+
+    if not cache:
+        return loader(io.BytesIO(content))
+
+    digest = hashlib.blake2b(content, digest_size=16).digest()
+    compiled = path.with_name(f'.{path.name}.msgpack')
+    try:
+        with open(compiled, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            if buffer[:len(digest)] == digest:
+                with memoryview(buffer) as view, view[len(digest):] as body:
+                    return unpackb(body, raw=False, strict_map_key=False)
+    except (OSError, ValueError):
+        pass
+
+    params = loader(io.BytesIO(content))
+    try:
+        dump = packb(params, use_bin_type=True)
+    except TypeError:
+        return params
+
+    temporary = compiled.with_name(f'{compiled.name}.{os.getpid()}')
+    try:
+        temporary.write_bytes(digest + dump)
+        os.replace(temporary, compiled)
+    except OSError:
+        pass
+    return params
+
+MISSING = object()
+
+
+class Accessor:
+
+    __slots__ = ('config', 'keys', 'default', 'version', 'value')
+
+    def __init__(self, config:'Config', keys:Tuple[Hashable, ...], default:Any=None):
+        self.config:Config = config
+        self.keys:Tuple[Hashable, ...] = keys
+        self.default:Any = default
+        self.version:Tuple[int, int] = (-1, -1)
+        self.value:Any = None
+
+    def __call__(self) -> Any:
+        version = (self.config.version, writes())
+        if self.version != version:
+            self.value = self.config.get(*self.keys, default=self.default)
+            self.version = version
+        return self.value
+
+
+class Subscription:
+
+    __slots__ = ('config', 'keys', 'callback', 'debounce', 'loop', 'logger', 'value', 'timer', 'lock')
+
+    def __init__(self, config:'Config', keys:Tuple[Hashable, ...], callback:Callable, debounce:float=0, loop:Optional[asyncio.AbstractEventLoop]=None, logger:Optional[logging.Logger]=None):
+        self.config:Config = config
+        self.keys:Tuple[Hashable, ...] = keys
+        self.callback:Callable = callback
+        self.debounce:float = debounce
+        self.loop:Optional[asyncio.AbstractEventLoop] = loop
+        self.logger:Optional[logging.Logger] = logger
+        self.value:Any = config.get(*keys, default=MISSING)
+        self.timer:Optional[Timer] = None
+        self.lock:Lock = Lock()
+
+    def changed(self) -> bool:
+        value = self.config.get(*self.keys, default=MISSING)
+        return not (value is self.value or value == self.value)
+
+    def notify(self):
+        if self.debounce <= 0:
+            self.fire()
+            return
+
+        with self.lock:
+            if self.timer is None and not self.changed():
+                return
+            if self.timer:
+                self.timer.cancel()
+            self.timer = Timer(self.debounce, self.fire)
+            self.timer.daemon = True
+            self.timer.start()
+
+    def fire(self):
+        with self.lock:
+            self.timer = None
+            if not self.changed():
+                return
+            self.value = self.config.get(*self.keys, default=MISSING)
+            value = None if self.value is MISSING else self.value
+
+        try:
+            if asyncio.iscoroutinefunction(self.callback):
+                asyncio.run_coroutine_threadsafe(self.callback(value), self.loop).add_done_callback(self.report)
+            else:
+                self.callback(value)
+        except Exception as e:
+            if self.logger:
+                self.logger.error(e)
+
+    def report(self, future:Future):
+        if self.logger and not future.cancelled() and future.exception() is not None:
+            self.logger.error(future.exception())
+
+    def cancel(self):
+        with self.lock:
+            if self.timer:
+                self.timer.cancel()
+                self.timer = None
+
+        if self in self.config.subscriptions:
+            self.config.subscriptions.remove(self)
+
+
 class Config:
 
     def __init__(self):
-        self.__detail = None
+        self.__state:Tuple[Optional[BaseNamespace], Dict[Tuple[Hashable, ...], Any]] = (None, {})
+        self.version = 0
+        self.written:int = writes()
+        self.subscriptions:List[Subscription] = []
 
     @property
     def detail(self):
-        return self.__detail
+        return self.__state[0]
 
     @detail.setter
     def detail(self, params:Dict[Hashable, Any]):
-        self.__detail = asclass(params)
+        self.__assign(asclass(params))
+
+    def __assign(self, detail:BaseNamespace):
+        self.__state = (detail, {})
+        self.version += 1
+
+        for subscription in list(self.subscriptions):
+            subscription.notify()
+
+    def __resolve(self, detail:BaseNamespace, keys:Tuple[Hashable, ...]) -> Any:
+        value = read(detail, *keys, default=MISSING)
+        if value is not MISSING or len(keys) != 1 or type(keys[0]) is not str or '.' not in keys[0]:
+            return value
+
+        node = detail
+        for key in keys[0].split('.'):
+            if isinstance(node, (BaseNamespace, dict)) and key in node:
+                node = node[key]
+            elif type(node) in (tuple, list) and key.isdigit() and int(key) < len(node):
+                node = node[int(key)]
+            else:
+                return MISSING
+        return node
 
     def get(self, *keys, shallow_search:bool=True, default:Any=None, **kwargs):
-        return read(self.detail, *keys, shallow_search=shallow_search, default=default)
+        if not keys:
+            return read(self.detail, shallow_search=shallow_search, default=default)
+
+        detail, index = self.__state
+        written = writes()
+        if self.written != written:
+            self.written = written
+            index.clear()
+
+        value = index.get(keys, MISSING)
+        if value is MISSING:
+            value = self.__resolve(detail, keys)
+            if value is MISSING:
+                return default if shallow_search else None
+            if writes() == written:
+                index[keys] = value
+        return value
+
+    def accessor(self, *keys, default:Any=None) -> Accessor:
+        return Accessor(self, keys, default)
+
+    def subscribe(self, path:Union[Hashable, Tuple[Hashable, ...]], callback:Callable, debounce:float=0, loop:Optional[asyncio.AbstractEventLoop]=None, logger:Optional[logging.Logger]=None) -> Callable[[], None]:
+        if asyncio.iscoroutinefunction(callback) and loop is None:
+            loop = asyncio.get_event_loop()
+
+        subscription = Subscription(self, path if type(path) is tuple else (path,), callback, debounce, loop, logger)
+        self.subscriptions.append(subscription)
+        return subscription.cancel
 
     def __update(self, data:Dict[Hashable, Any], partial:bool=True):
-        self.detail = partial_update(asdict(self.detail), data) if partial else data
+        current = self.__state[0]
+        if current is None:
+            self.detail = data
+            return
+
+        detail = merge(current, data, partial=partial)
+        if detail is not current:
+            self.__assign(detail)
 
     async def watch_async(self, loop:asyncio.AbstractEventLoop, emitter:Callable, refresh:bool=True, partial:bool=True, logger:Optional[logging.Logger]=None, **timedetail):
 
-        if not asyncio.iscoroutinefunction(emitter):
-            emitter = asyncio.coroutine(emitter)
+        emitter = ensure_coroutine(emitter)
 
         @call_after(loop, repeated=refresh, **timedetail)
         async def observer(ignore_exception:bool=True):
@@ -84,25 +287,38 @@ class Config:
         task.start()
 
 
+    def watch_file(self, path:Union[str, Path], partial:bool=False, logger:Optional[logging.Logger]=None, cache:bool=False) -> Callable[[], None]:
+        path = Path(path)
+        if path.suffix not in LOADER:
+            raise Exception(f"file format {path.suffix} is not supported")
+
+        def observer(_:Path, content:bytes):
+            try:
+                self.__update(parse(path, content, cache), partial)
+            except Exception as e:
+                if logger:
+                    logger.error(e)
+
+        return get_watcher().watch(path, observer)
+
+
 @lru_cache(typed=True)
 def get_config(*args, **kwargs):
     return Config()
 
 
-def load_config(*args, path:Union[str, Path, type(None)]=None, **kwargs):
+def load_config(*args, path:Union[str, Path, type(None)]=None, watch:bool=False, logger:Optional[logging.Logger]=None, cache:bool=False, **kwargs):
     params = {}
 
     if path:
         if type(path) is str:
             path = Path(path)
 
-        with open(path, encoding='utf-8') as f:
-            loader = LOADER.get(path.suffix)
-            if loader is None:
-                raise Exception(f"file format {path.suffix} is not supported")
-
-            params = loader(f)
+        params = parse(path, path.read_bytes(), cache)
 
     config = get_config(*args, **kwargs)
     config.detail = params
+
+    if path and watch:
+        config.watch_file(path, logger=logger, cache=cache)
     return config
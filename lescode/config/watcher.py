@@ -0,0 +1,180 @@
+import ctypes
+import ctypes.util
+import hashlib
+import logging
+import os
+import select
+import struct
+import time
+from functools import lru_cache
+from pathlib import Path
+from threading import Lock, Thread
+from typing import *
+from typing import Callable
+
+
+IN_ATTRIB = 0x004
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_MASK = IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT = struct.Struct('iIII')
+
+Listener = Callable[[Path, bytes], Any]
+
+
+class Inotify:
+
+    def __init__(self):
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self.fd:int = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self.directories:Dict[int, Path] = {}
+
+    def add(self, directory:Path) -> int:
+        wd = self.libc.inotify_add_watch(self.fd, str(directory).encode(), IN_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f'inotify_add_watch failed for {directory}')
+        self.directories[wd] = directory
+        return wd
+
+    def read(self, timeout:float) -> Set[Path]:
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return set()
+
+        changed = set()
+        while True:
+            try:
+                buffer = os.read(self.fd, 1 << 16)
+            except BlockingIOError:
+                return changed
+
+            offset = 0
+            while offset < len(buffer):
+                wd, _, _, size = EVENT.unpack_from(buffer, offset)
+                offset += EVENT.size + size
+                if wd in self.directories:
+                    changed.add(self.directories[wd])
+
+
+class Watched:
+
+    __slots__ = ('path', 'signature', 'digest', 'listeners')
+
+    def __init__(self, path:Path):
+        self.path:Path = path
+        self.signature:Optional[Tuple[int, int, int]] = None
+        self.digest:Optional[bytes] = None
+        self.listeners:List[Listener] = []
+
+
+class FileWatcher:
+
+    def __init__(self, interval:float=1, inotify:bool=True):
+        self.interval:float = interval
+        self.files:Dict[Path, Watched] = {}
+        self.lock:Lock = Lock()
+        self.logger:logging.Logger = logging.getLogger(__name__)
+        self.thread:Optional[Thread] = None
+        self.inotify:Optional[Inotify] = None
+
+        if inotify:
+            try:
+                self.inotify = Inotify()
+            except (OSError, AttributeError, TypeError):
+                self.inotify = None
+
+    def watch(self, path:Union[str, Path], listener:Listener) -> Callable[[], None]:
+        path = Path(path).absolute()
+        with self.lock:
+            watched = self.files.get(path)
+            if watched is None:
+                watched = self.files[path] = Watched(path)
+                self.refresh(watched)
+                self.observe(path)
+            watched.listeners.append(listener)
+
+            if self.thread is None:
+                self.thread = Thread(target=self.run, name='config-watcher', daemon=True)
+                self.thread.start()
+
+        return lambda: self.unwatch(path, listener)
+
+    def unwatch(self, path:Union[str, Path], listener:Listener):
+        path = Path(path).absolute()
+        with self.lock:
+            watched = self.files.get(path)
+            if watched and listener in watched.listeners:
+                watched.listeners.remove(listener)
+                if not watched.listeners:
+                    del self.files[path]
+
+    def directories(self, path:Path) -> Set[Path]:
+        return {path.parent, path.resolve().parent}
+
+    def observe(self, path:Path):
+        if not self.inotify:
+            return
+
+        for directory in self.directories(path) - set(self.inotify.directories.values()):
+            try:
+                self.inotify.add(directory)
+            except OSError as e:
+                self.logger.error(e)
+
+    def refresh(self, watched:Watched) -> Optional[bytes]:
+        try:
+            stat = watched.path.stat()
+        except FileNotFoundError:
+            watched.signature = None
+            return None
+
+        signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if signature == watched.signature:
+            return None
+
+        content = watched.path.read_bytes()
+        digest = hashlib.blake2b(content, digest_size=16).digest()
+        watched.signature = signature
+        if digest == watched.digest:
+            return None
+
+        watched.digest = digest
+        return content
+
+    def check(self, paths:Iterable[Path]):
+        for path in paths:
+            with self.lock:
+                watched = self.files.get(path)
+                if watched is None:
+                    continue
+                content = self.refresh(watched)
+                listeners = list(watched.listeners)
+                if content is not None:
+                    self.observe(path)
+
+            if content is None:
+                continue
+
+            for listener in listeners:
+                try:
+                    listener(path, content)
+                except Exception as e:
+                    self.logger.error(e)
+
+    def run(self):
+        while True:
+            if self.inotify:
+                directories = self.inotify.read(self.interval)
+                if directories:
+                    self.check([path for path in list(self.files) if self.directories(path) & directories])
+            else:
+                time.sleep(self.interval)
+                self.check(list(self.files))
+
+
+@lru_cache()
+def get_watcher() -> FileWatcher:
+    return FileWatcher()
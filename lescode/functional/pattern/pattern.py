@@ -226,7 +226,7 @@ def ensure_coroutine(action:Callable) -> Callable:
         async def wrapper(*args, **kwargs):
             return action(*args, **kwargs)
 
-        action = wrapper
+        return wrapper
     return action
 
 
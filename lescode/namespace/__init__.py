@@ -1 +1 @@
-from .namespace import build, BaseNamespace, asdict, asclass, keysof, itemsof, valuesof, read
\ No newline at end of file
+from .namespace import build, BaseNamespace, asdict, asclass, keysof, itemsof, merge, valuesof, read, writes
\ No newline at end of file
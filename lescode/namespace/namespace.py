@@ -1,51 +1,178 @@
 from typing import *
 from copy import deepcopy
-from functools import partial
+from functools import lru_cache, partial
 
-from ..functional import case, compose, is_instance, map, curry
+from ..functional import case, is_instance, map, curry
+
+
+SCALARS = (str, int, float, bool, type(None))
+WRITES = [0]
+
+
+def writes() -> int:
+    return WRITES[0]
 
 
 class BaseNamespace(Mapping):
-    pass
+    __slots__ = ()
+
+
+class Namespace(BaseNamespace):
+    __slots__ = ('__extra__',)
+    __names__:Dict[Hashable, str] = {}
+    __fields__:Tuple[Hashable, ...] = ()
+    __frozen__:bool = False
+
+    def __getattr__(self, key:str):
+        names = type(self).__names__
+        if key in names:
+            return object.__getattribute__(self, names[key])
+
+        extra = object.__getattribute__(self, '__extra__')
+        if extra and key in extra:
+            return extra[key]
+
+        raise AttributeError(key)
+
+    def __contains__(self, key:Hashable):
+        return key in type(self).__names__ or bool(self.__extra__) and key in self.__extra__
+
+    def __getitem__(self, key:Hashable):
+        name = type(self).__names__.get(key)
+        if name is not None:
+            return object.__getattribute__(self, name)
+
+        if self.__extra__ and key in self.__extra__:
+            return self.__extra__[key]
+
+        raise KeyError(key)
+
+    def __setitem__(self, key:Hashable, value:Any):
+        if self.__frozen__:
+            raise Exception('Namespace is frozen')
+
+        name = type(self).__names__.get(key)
+        if name is not None:
+            object.__setattr__(self, name, value)
+        elif self.__extra__ is None:
+            object.__setattr__(self, '__extra__', {key: value})
+        else:
+            self.__extra__[key] = value
+        WRITES[0] += 1
+
+    def __setattr__(self, key:Hashable, value:Any):
+        self.__setitem__(key, value)
+
+    def __iter__(self):
+        yield from type(self).__fields__
+        if self.__extra__:
+            yield from self.__extra__
+
+    def __repr__(self):
+        return asdict(self).__repr__()
+
+    def __len__(self):
+        return len(type(self).__fields__) + len(self.__extra__ or ())
+
+    def __reduce__(self):
+        return build, ({key: self[key] for key in self}, self.__frozen__, False)
+
+
+class View(BaseNamespace):
+    __slots__ = ('__data__', '__cache__')
+
+    def __init__(self, data:Mapping):
+        object.__setattr__(self, '__data__', data)
+        object.__setattr__(self, '__cache__', {})
+
+    def __getattribute__(self, key:str):
+        cache = object.__getattribute__(self, '__cache__')
+        if key in cache:
+            return cache[key]
+
+        data = object.__getattribute__(self, '__data__')
+        if key in data:
+            value = data[key]
+            if isinstance(value, (dict, list)):
+                value = cache[key] = view(value)
+            return value
+
+        return object.__getattribute__(self, key)
+
+    def __contains__(self, key:Hashable):
+        return key in object.__getattribute__(self, '__data__')
 
+    def __getitem__(self, key:Hashable):
+        if key not in self:
+            raise KeyError(key)
+        return View.__getattribute__(self, key)
 
-def build(data:Optional[Dict[Hashable, Any]]=None, frozen:bool=False) -> BaseNamespace:
+    def __setitem__(self, key:Hashable, value:Any):
+        raise Exception('Namespace is read-only')
 
-    data = deepcopy(data) if data else {}
+    def __setattr__(self, key:Hashable, value:Any):
+        self.__setitem__(key, value)
 
-    class Namespace(BaseNamespace):
-        
-        def __getattribute__(self, key:str):
-            if key in data:
-                return data[key]
+    def __iter__(self):
+        return iter(object.__getattribute__(self, '__data__'))
 
-            return super(Namespace, self).__getattribute__(key)
-        
-        def __contains__(self, key:str):
-            return key in data
+    def __repr__(self):
+        return asdict(self).__repr__()
 
-        def __getitem__(self, ind:Union[int, str]):
-            return self.__getattribute__(ind)
+    def __len__(self):
+        return len(object.__getattribute__(self, '__data__'))
 
-        def __setitem__(self, key:Hashable, value:Any):
-            if frozen:
-                raise Exception('Namespace is frozen')
-            data[key] = value
+    def __reduce__(self):
+        return View, (object.__getattribute__(self, '__data__'),)
 
-        def __setattr__(self, key:Hashable, value:Any):
-            self.__setitem__(key, value)
 
-        def __iter__(self):
-            for key in data:
-                yield key
-        
-        def __repr__(self):
-            return asdict(self).__repr__()
+RESERVED = frozenset(dir(Namespace))
 
-        def __len__(self):
-            return len(data)
 
-    return Namespace()
+def view(value:Any) -> Any:
+    if isinstance(value, dict):
+        return View(value)
+    if isinstance(value, list):
+        return tuple(view(item) for item in value)
+    return value
+
+
+@lru_cache(maxsize=4096)
+def shape(keys:Tuple[Hashable, ...], frozen:bool=False) -> Type[Namespace]:
+    taken = {key for key in keys if type(key) is str}
+    names = []
+
+    for index, key in enumerate(keys):
+        if type(key) is str and key.isidentifier() and not key.startswith('__') and key not in RESERVED:
+            names.append(key)
+            continue
+
+        name, n = f'_{index}', 0
+        while name in taken:
+            n += 1
+            name = f'_{index}_{n}'
+        taken.add(name)
+        names.append(name)
+
+    return type('Namespace', (Namespace,), {
+        '__slots__': tuple(names),
+        '__names__': dict(zip(keys, names)),
+        '__fields__': keys,
+        '__frozen__': frozen,
+    })
+
+
+def build(data:Optional[Dict[Hashable, Any]]=None, frozen:bool=False, copy:bool=True) -> BaseNamespace:
+
+    data = (deepcopy(data) if copy else data) if data else {}
+    cls = shape(tuple(data), frozen)
+    namespace = cls.__new__(cls)
+
+    object.__setattr__(namespace, '__extra__', None)
+    for name, value in zip(cls.__slots__, data.values()):
+        object.__setattr__(namespace, name, value)
+
+    return namespace
 
 
 def itemsof(namespace:BaseNamespace) -> Iterator[Tuple[Hashable, Any]]:
@@ -81,35 +208,20 @@ def asdict(namespace:BaseNamespace):
     return {key: parse(value) for key, value in itemsof(namespace)}
 
 
-def asclass(data:Dict[Hashable, Any], **kwargs):
-    parse_list = lambda val: tuple(map(
-        case(
-            predicate=is_instance(dict),
-            action=partial(asclass, **kwargs),
-            otherwise=case(
-                predicate=is_instance(list),
-                action=parse_list
-            )
-        ),
-        val
-    ))
+def asclass(data:Dict[Hashable, Any], lazy:bool=False, **kwargs):
+    if lazy:
+        return View(data if data else {})
 
-    parse = case(
-        predicate=is_instance(dict),
-        action=partial(asclass, **kwargs),
-        otherwise=case(
-            predicate=is_instance(list),
-            action=parse_list
-        )
-    )
+    def parse(value:Any) -> Any:
+        if isinstance(value, dict):
+            return asclass(value, **kwargs)
+        if isinstance(value, list):
+            return tuple(parse(item) for item in value)
+        if type(value) in SCALARS:
+            return value
+        return deepcopy(value)
 
-    if data:
-        keys, values = zip(*data.items())
-        values = compose(tuple, map(parse))(values)
-    else:
-        keys, values = (), ()
-
-    return build(dict(zip(keys, values)), **kwargs)
+    return build({key: parse(value) for key, value in data.items()} if data else {}, copy=False, **kwargs)
 
 
 @curry
@@ -127,4 +239,46 @@ def read(_layer:BaseNamespace, *keys, shallow_search:bool=True, default:Any=None
                 return None
 
         return curr
-    return partial(read, _layer, shallow_search=shallow_search, default=default)
\ No newline at end of file
+    return partial(read, _layer, shallow_search=shallow_search, default=default)
+
+
+def __reuse(current:Any, value:Any, **kwargs) -> Any:
+    if isinstance(value, dict):
+        if isinstance(current, BaseNamespace):
+            return merge(current, value, partial=False, **kwargs)
+        return asclass(value, **kwargs)
+
+    if isinstance(value, list):
+        if type(current) is tuple and len(current) == len(value):
+            values = tuple(__reuse(old, new, **kwargs) for old, new in zip(current, value))
+            if all(old is new for old, new in zip(current, values)):
+                return current
+            return values
+        return tuple(__reuse(None, new, **kwargs) for new in value)
+
+    if type(current) is type(value) and current == value:
+        return current
+    return value if type(value) in SCALARS else deepcopy(value)
+
+
+def merge(namespace:BaseNamespace, data:Dict[Hashable, Any], partial:bool=True, **kwargs) -> BaseNamespace:
+    values = dict(itemsof(namespace))
+    changed = not partial and len(values) != len(data)
+
+    for key, value in data.items():
+        current = values.get(key)
+        if partial and isinstance(value, dict) and isinstance(current, BaseNamespace):
+            updated = merge(current, value, partial=True, **kwargs)
+        else:
+            updated = __reuse(current, value, **kwargs)
+
+        if key not in values or updated is not current:
+            changed = True
+        values[key] = updated
+
+    if not changed:
+        return namespace
+
+    if not partial:
+        values = {key: values[key] for key in data}
+    return build(values, copy=False, **kwargs)
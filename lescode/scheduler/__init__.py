@@ -1 +1,4 @@
-from .scheduler import call_after, call_at, Scheduler
\ No newline at end of file
+from .scheduler import call_after, call_at, Scheduler
+from .store import MemoryStore, SqliteStore
+from .threaded import ThreadScheduler
+from .types import JobStore
@@ -1,68 +1,368 @@
 import asyncio
 import functools
+import heapq
+import itertools
+import time
+import uuid
+from concurrent.futures import Executor, Future
 from functools import partial
 
 from datetime import datetime, timedelta
 from typing import *
 from typing import Callable
 
-from .types import Task
-from .time import get_next_runtime
+from .types import JobStore, SchedulerInfo, Task
+from .time import compile_schedule
+
+
+OVERLAPS = (None, 'skip', 'queue', 'replace')
+LEADER = '__leader__'
+
+
+def dispatch(loop:asyncio.AbstractEventLoop, action:Callable, executor:Optional[Executor]=None) -> Callable[[], Awaitable]:
+    if asyncio.iscoroutinefunction(action):
+        return action
+
+    @functools.wraps(action)
+    async def wrapper():
+        return await loop.run_in_executor(executor, action)
+
+    return wrapper
+
+
+async def measure(task:Task, action:Callable[[], Awaitable], scheduled:float, clock:Callable[[], float]) -> Any:
+    start = clock()
+    task.start(max(start - scheduled, 0), time.time())
+    error = None
+    try:
+        return await action()
+    except Exception as e:
+        error = e
+        raise e
+    finally:
+        task.finish(clock() - start, error)
+
+
+class Job:
+
+    __slots__ = ('name', 'action', 'trigger', 'repeated', 'task', 'overlap', 'concurrency', 'limit', 'running')
+
+    def __init__(self, name:str, action:Callable, trigger:Callable[[], Optional[float]], repeated:bool, task:Task, overlap:Optional[str]=None, concurrency:int=0, semaphore:Callable[[int], Any]=asyncio.Semaphore):
+        self.name:str = name
+        self.action:Callable = action
+        self.trigger:Callable[[], Optional[float]] = trigger
+        self.repeated:bool = repeated
+        self.task:Task = task
+        self.overlap:Optional[str] = overlap
+        self.concurrency:int = max(concurrency, 1) if overlap else concurrency
+        self.limit:Optional[asyncio.Semaphore] = semaphore(self.concurrency) if self.concurrency > 0 else None
+        self.running:List[Future] = []
+
+
+class Entry:
+
+    __slots__ = ('when', 'sequence', 'job', 'scheduler', 'canceled')
+
+    def __init__(self, when:float, sequence:int, job:Job, scheduler:'Scheduler'):
+        self.when:float = when
+        self.sequence:int = sequence
+        self.job:Job = job
+        self.scheduler:Scheduler = scheduler
+        self.canceled:bool = False
+
+    def cancel(self):
+        if not self.canceled:
+            self.canceled = True
+            self.scheduler.discard(self)
+
+
+def at_trigger(clock:Callable[[], float], **timedetail) -> Callable[[], Optional[float]]:
+    schedule = compile_schedule(**timedetail)
+
+    def trigger() -> Optional[float]:
+        now = datetime.now()
+        next_run = schedule.next_after(now)
+        if next_run is None:
+            return None
+        return clock() + (next_run - now).total_seconds()
+
+    return trigger
+
+
+def after_trigger(clock:Callable[[], float], fixed_rate:bool=False, catch_up:bool=False, **timedetail) -> Callable[[], Optional[float]]:
+    delay = timedelta(**timedetail).total_seconds()
+    if not fixed_rate or delay <= 0:
+        return lambda: clock() + delay
+
+    anchor, ticks = None, 0
+
+    def trigger() -> float:
+        nonlocal anchor, ticks
+        now = clock()
+        if anchor is None:
+            anchor = now
+
+        ticks += 1
+        if not catch_up:
+            ticks = max(ticks, int((now - anchor) // delay) + 1)
+        return anchor + ticks * delay
+
+    return trigger
 
 
 class Scheduler:
 
-    def __init__(self, loop:asyncio.AbstractEventLoop):
+    def __init__(self, loop:Optional[asyncio.AbstractEventLoop], concurrency:int=0, executor:Optional[Executor]=None, store:Optional[JobStore]=None, lease:float=30, leader:bool=False, owner:Optional[str]=None):
         self.loop = loop
+        self.clock:Callable[[], float] = loop.time if loop else time.monotonic
+        self.executor:Optional[Executor] = executor
+        self.store:Optional[JobStore] = store
+        self.lease:float = lease
+        self.leader:bool = leader
+        self.owner:str = owner or uuid.uuid4().hex
+        self.leases:Set[str] = set()
+        self.limit:Optional[asyncio.Semaphore] = self.semaphore(concurrency) if concurrency > 0 else None
         self.tasks:List[Task] = []
         self.actions:List[Callable] = []
+        self.queue:List[Tuple[float, int, Entry]] = []
+        self.live:int = 0
+        self.sequence:Iterator[int] = itertools.count()
+        self.timer:Optional[asyncio.TimerHandle] = None
+        self.deferred:bool = False
 
-    def schedule(self, caller:Optional[Callable], repeated:bool=False, **timedetail):
+    def schedule(self, caller:Optional[Callable], repeated:bool=False, overlap:Optional[str]=None, concurrency:int=0, executor:Optional[Executor]=None, name:Optional[str]=None, **timedetail):
+        if overlap not in OVERLAPS:
+            raise Exception(f"overlap must be one of {OVERLAPS}, got {overlap}")
 
         def decorator(func:Callable):
-            task = Task()
+            task = Task(name or f"{func.__module__}.{func.__qualname__}")
             handle = func
 
             for key, value in func.__annotations__.items():
                 if value is Task:
                     handle = partial(handle, **{key: task})
                 
-                if value is Scheduler:
+                if value in (Scheduler, type(self)):
                     handle = partial(handle, **{key: self})
 
-            future = caller(self.loop, repeated=repeated, **timedetail)(handle)
             self.tasks.append(task)
 
-            @functools.wraps(func)
-            def wrapper(*args, **kwargs):
-                task.handle = future.promise(*args, **kwargs)
+            if caller in TRIGGERS:
+
+                @functools.wraps(func)
+                def wrapper(*args, **kwargs):
+                    if task.handle:
+                        task.handle.cancel()
+                    trigger = TRIGGERS[caller](self.clock, **timedetail)
+                    action = self.prepare(partial(handle, *args, **kwargs), executor or self.executor)
+                    self.submit(Job(task.name, action, trigger, repeated, task, overlap, concurrency, self.semaphore))
+            else:
+                future = caller(self.loop, repeated=repeated, **timedetail)(handle)
+
+                @functools.wraps(func)
+                def wrapper(*args, **kwargs):
+                    task.handle = future.promise(*args, **kwargs)
 
             self.actions.append(wrapper)
             return func
 
         return decorator
 
-    def ready(self):
-        for action in self.actions:
-            action()
+    def semaphore(self, size:int) -> asyncio.Semaphore:
+        return asyncio.Semaphore(size)
 
+    def prepare(self, action:Callable, executor:Optional[Executor]) -> Callable:
+        return dispatch(self.loop, action, executor)
 
-def call_at(loop:asyncio.AbstractEventLoop, repeated:bool=False, **timedetail):
+    def ready(self):
+        self.deferred = True
+        try:
+            for action in self.actions:
+                action()
+        finally:
+            self.deferred = False
+        heapq.heapify(self.queue)
+        self.arm()
+
+        if self.store:
+            self.heartbeat()
+
+    def heartbeat(self):
+        self.renew()
+        self.loop.call_later(self.lease / 3, self.heartbeat)
+
+    def renew(self):
+        now = time.time()
+        for name in ([LEADER] if self.leader else list(self.leases)):
+            if not self.store.acquire(name, self.owner, self.lease, now):
+                self.leases.discard(name)
+
+    def acquire(self, job:Job) -> bool:
+        if not self.store:
+            return True
+
+        now = time.time()
+        if self.leader:
+            return self.store.owner(LEADER, now) == self.owner
+        if self.store.acquire(job.name, self.owner, self.lease, now):
+            self.leases.add(job.name)
+            return True
+
+        self.leases.discard(job.name)
+        return False
+
+    def resign(self):
+        if not self.store:
+            return
+
+        for name in ([LEADER] if self.leader else list(self.leases)):
+            self.store.release(name, self.owner)
+        self.leases.clear()
+
+    def release(self, job:Job):
+        if self.store and job.name in self.leases:
+            self.leases.discard(job.name)
+            self.store.release(job.name, self.owner)
+
+    def discard(self, entry:Entry):
+        self.live -= 1
+        if entry.job.task.state == 'canceled' and not entry.job.running:
+            self.release(entry.job)
+
+    def submit(self, job:Job):
+        when = job.trigger()
+        if when is None:
+            job.task.set_state('finished')
+            if not job.running:
+                self.release(job)
+            return
+
+        entry = Entry(when, next(self.sequence), job, self)
+        job.task.set_state('pending')
+        job.task.handle = entry
+        self.live += 1
+
+        if self.deferred:
+            self.queue.append((entry.when, entry.sequence, entry))
+            return
+
+        heapq.heappush(self.queue, (entry.when, entry.sequence, entry))
+        if len(self.queue) > 2 * self.live + 64:
+            self.queue = [item for item in self.queue if not item[2].canceled]
+            heapq.heapify(self.queue)
+
+        if self.queue[0][2] is entry:
+            self.arm()
+
+    def arm(self):
+        while self.queue and self.queue[0][2].canceled:
+            heapq.heappop(self.queue)
+
+        if self.timer:
+            self.timer.cancel()
+            self.timer = None
+
+        if self.queue:
+            self.timer = self.loop.call_at(self.queue[0][0], self.tick)
+
+    def tick(self):
+        self.timer = None
+        now = self.clock()
+
+        while self.queue and self.queue[0][0] <= now:
+            _, _, entry = heapq.heappop(self.queue)
+            if entry.canceled:
+                continue
+
+            self.live -= 1
+            entry.canceled = True
+            self.run(entry.job, entry.when)
+
+        self.arm()
+
+    def run(self, job:Job, when:float):
+        if not self.acquire(job):
+            job.task.skips += 1
+            if job.repeated:
+                self.submit(job)
+            else:
+                job.task.set_state('skipped')
+            return
+
+        if job.overlap and len(job.running) >= job.concurrency + (job.overlap == 'queue'):
+            if job.overlap != 'replace' or not job.running[0].cancel():
+                job.task.skips += 1
+                if job.repeated:
+                    self.submit(job)
+                    job.task.set_state('running')
+                return
+
+        future = self.spawn(job, when)
+        job.running.append(future)
+
+        if job.overlap and job.repeated:
+            self.submit(job)
+        job.task.set_state('running')
+        future.add_done_callback(partial(self.done, job))
+
+    def spawn(self, job:Job, when:float) -> asyncio.Future:
+        return asyncio.ensure_future(self.execute(job, when), loop=self.loop)
+
+    def done(self, job:Job, future:Future):
+        job.running.remove(future)
+        if job.running:
+            return
+
+        if job.task.state == 'canceled':
+            self.release(job)
+        elif job.overlap and job.repeated:
+            handle = job.task.handle
+            if handle and not handle.canceled:
+                job.task.set_state('pending')
+            else:
+                job.task.set_state('finished')
+                self.release(job)
+        elif job.repeated:
+            self.submit(job)
+        else:
+            job.task.set_state('finished')
+            self.release(job)
+
+    async def execute(self, job:Job, when:float) -> Any:
+        if job.limit:
+            async with job.limit:
+                return await self.perform(job, when)
+        return await self.perform(job, when)
+
+    async def perform(self, job:Job, when:float) -> Any:
+        if self.limit:
+            async with self.limit:
+                return await measure(job.task, job.action, when, self.clock)
+        return await measure(job.task, job.action, when, self.clock)
+
+    def info(self) -> SchedulerInfo:
+        tasks = [task.info() for task in self.tasks]
+        return SchedulerInfo(
+            pending=self.live,
+            running=sum(task.running for task in tasks),
+            tasks=sorted(tasks, key=lambda task: task.duration * task.runs, reverse=True)
+        )
+
+
+def call_at(loop:asyncio.AbstractEventLoop, repeated:bool=False, executor:Optional[Executor]=None, **timedetail):
 
     def decorator(func, **options):
 
         @functools.wraps(func)
         def wrapper(*args, **kwargs) -> Task:
-            action = partial(func, *args, **{**options, **kwargs})
-
-            if not asyncio.iscoroutinefunction(action):
-                action = asyncio.coroutine(action)
+            action = dispatch(loop, partial(func, *args, **{**options, **kwargs}), executor)
 
-            task = Task()
+            task = Task(f"{func.__module__}.{func.__qualname__}")
+            schedule = compile_schedule(**timedetail)
 
             def reschedule():
                 task.set_state("pending")
-                next_run = get_next_runtime(datetime.now(), **timedetail)
+                next_run = schedule.next_after(datetime.now())
 
                 if next_run:
                     timestamp = next_run.timestamp() - datetime.now().timestamp() + loop.time()
@@ -72,7 +372,7 @@ def call_at(loop:asyncio.AbstractEventLoop, repeated:bool=False, **timedetail):
 
             def run():
                 task.set_state("running")
-                future = asyncio.ensure_future(action(), loop=loop)
+                future = asyncio.ensure_future(measure(task, action, task.handle.when(), loop.time), loop=loop)
                 if repeated:
                     future.add_done_callback(lambda _: reschedule())
                 else:
@@ -87,27 +387,23 @@ def call_at(loop:asyncio.AbstractEventLoop, repeated:bool=False, **timedetail):
     return decorator
 
 
-def call_after(loop:asyncio.AbstractEventLoop, repeated:bool=False, **timedetail):
+def call_after(loop:asyncio.AbstractEventLoop, repeated:bool=False, executor:Optional[Executor]=None, fixed_rate:bool=False, catch_up:bool=False, **timedetail):
 
     def decorator(func, **options):
 
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            action = partial(func, *args, **{**options, **kwargs})
-
-            if not asyncio.iscoroutinefunction(action):
-                action = asyncio.coroutine(action)
-
-            task = Task()
+            action = dispatch(loop, partial(func, *args, **{**options, **kwargs}), executor)
+            trigger = after_trigger(loop.time, fixed_rate=fixed_rate, catch_up=catch_up, **timedetail)
+            task = Task(f"{func.__module__}.{func.__qualname__}")
 
             def reschedule():
                 task.set_state("pending")
-                timestamp = timedelta(**timedetail).total_seconds()
-                task.handle = loop.call_later(delay=timestamp, callback=run)
+                task.handle = loop.call_at(when=trigger(), callback=run)
 
             def run():
                 task.set_state("running")
-                future = asyncio.ensure_future(action(), loop=loop)
+                future = asyncio.ensure_future(measure(task, action, task.handle.when(), loop.time), loop=loop)
                 if repeated:
                     future.add_done_callback(lambda _: reschedule())
                 else:
@@ -120,3 +416,9 @@ def call_after(loop:asyncio.AbstractEventLoop, repeated:bool=False, **timedetail
         return func
 
     return decorator
+
+
+TRIGGERS = {
+    call_at: at_trigger,
+    call_after: after_trigger,
+}
@@ -0,0 +1,70 @@
+import os
+import sqlite3
+from pathlib import Path
+from threading import Lock
+from typing import *
+from typing import Callable
+
+from .types import JobStore
+
+
+class MemoryStore(JobStore):
+
+    def __init__(self):
+        self.leases:Dict[str, Tuple[str, float]] = {}
+        self.lock:Lock = Lock()
+
+    def acquire(self, name:str, owner:str, lease:float, now:float) -> bool:
+        with self.lock:
+            holder, expires = self.leases.get(name, (owner, now))
+            if holder != owner and expires > now:
+                return False
+            self.leases[name] = (owner, now + lease)
+            return True
+
+    def release(self, name:str, owner:str):
+        with self.lock:
+            if self.leases.get(name, (None,))[0] == owner:
+                del self.leases[name]
+
+    def owner(self, name:str, now:float) -> Optional[str]:
+        holder, expires = self.leases.get(name, (None, now))
+        return holder if expires > now else None
+
+
+class SqliteStore(JobStore):
+
+    def __init__(self, path:Union[str, Path], table:str='jobs', timeout:float=5):
+        self.path:str = str(path)
+        self.table:str = table
+        self.timeout:float = timeout
+        self.lock:Lock = Lock()
+        self.__pid:Optional[int] = None
+        self.__connection:Optional[sqlite3.Connection] = None
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self.__pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute(f'CREATE TABLE IF NOT EXISTS "{self.table}" (name TEXT PRIMARY KEY, owner TEXT, expires REAL)')
+            self.__pid, self.__connection = os.getpid(), connection
+
+        return self.__connection
+
+    def acquire(self, name:str, owner:str, lease:float, now:float) -> bool:
+        with self.lock:
+            return self.connection.execute(
+                f'''INSERT INTO "{self.table}" VALUES (?, ?, ?) ON CONFLICT(name) DO UPDATE
+                    SET owner = excluded.owner, expires = excluded.expires WHERE owner = excluded.owner OR expires <= ?''',
+                (name, owner, now + lease, now)
+            ).rowcount == 1
+
+    def release(self, name:str, owner:str):
+        with self.lock:
+            self.connection.execute(f'DELETE FROM "{self.table}" WHERE name = ? AND owner = ?', (name, owner))
+
+    def owner(self, name:str, now:float) -> Optional[str]:
+        with self.lock:
+            row = self.connection.execute(f'SELECT owner FROM "{self.table}" WHERE name = ? AND expires > ?', (name, now)).fetchone()
+        return row[0] if row else None
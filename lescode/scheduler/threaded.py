@@ -0,0 +1,130 @@
+import asyncio
+import heapq
+import threading
+import time
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from typing import *
+from typing import Callable
+
+from .scheduler import TRIGGERS, Entry, Job, Scheduler
+from .types import JobStore
+
+
+class ThreadScheduler(Scheduler):
+
+    def __init__(self, workers:Optional[int]=None, concurrency:int=0, executor:Optional[Executor]=None, store:Optional[JobStore]=None, lease:float=30, leader:bool=False, owner:Optional[str]=None):
+        super().__init__(None, concurrency, executor, store, lease, leader, owner)
+        self.condition:threading.Condition = threading.Condition(threading.RLock())
+        self.pool:ThreadPoolExecutor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='scheduler')
+        self.thread:Optional[threading.Thread] = None
+        self.renewal:Optional[float] = None
+        self.stopped:bool = False
+
+    def schedule(self, caller:Optional[Callable], repeated:bool=False, **kwargs):
+        if caller not in TRIGGERS:
+            raise Exception(f"{getattr(caller, '__name__', caller)} is not supported by thread scheduler")
+        return super().schedule(caller, repeated, **kwargs)
+
+    def semaphore(self, size:int) -> threading.BoundedSemaphore:
+        return threading.BoundedSemaphore(size)
+
+    def prepare(self, action:Callable, executor:Optional[Executor]) -> Callable:
+        if asyncio.iscoroutinefunction(action):
+            return lambda: asyncio.run(action())
+
+        if executor:
+            return lambda: executor.submit(action).result()
+
+        return action
+
+    def ready(self):
+        with self.condition:
+            super().ready()
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.tick, name='scheduler-timer', daemon=True)
+                self.thread.start()
+
+    def stop(self, wait:bool=True):
+        with self.condition:
+            self.stopped = True
+            self.condition.notify()
+
+        if self.thread:
+            self.thread.join()
+        self.pool.shutdown(wait=wait)
+
+        with self.condition:
+            self.resign()
+
+    def heartbeat(self):
+        with self.condition:
+            self.renewal = self.clock()
+            self.condition.notify()
+
+    def discard(self, entry:Entry):
+        with self.condition:
+            super().discard(entry)
+
+    def submit(self, job:Job):
+        with self.condition:
+            super().submit(job)
+
+    def arm(self):
+        self.condition.notify()
+
+    def tick(self):
+        with self.condition:
+            while not self.stopped:
+                now = self.clock()
+                if self.renewal is not None and now >= self.renewal:
+                    self.renew()
+                    self.renewal = now + self.lease / 3
+
+                while self.queue and self.queue[0][2].canceled:
+                    heapq.heappop(self.queue)
+
+                timeout = self.renewal - now if self.renewal is not None else None
+                if not self.queue:
+                    self.condition.wait(timeout)
+                    continue
+
+                delay = self.queue[0][0] - now
+                if delay > 0:
+                    self.condition.wait(delay if timeout is None else min(delay, timeout))
+                    continue
+
+                _, _, entry = heapq.heappop(self.queue)
+                self.live -= 1
+                entry.canceled = True
+                self.run(entry.job, entry.when)
+
+    def spawn(self, job:Job, when:float) -> Future:
+        return self.pool.submit(self.execute, job, when)
+
+    def done(self, job:Job, future:Future):
+        with self.condition:
+            super().done(job, future)
+
+    def execute(self, job:Job, when:float) -> Any:
+        if job.limit:
+            with job.limit:
+                return self.perform(job, when)
+        return self.perform(job, when)
+
+    def perform(self, job:Job, when:float) -> Any:
+        if self.limit:
+            with self.limit:
+                return self.measure(job, when)
+        return self.measure(job, when)
+
+    def measure(self, job:Job, when:float) -> Any:
+        start = self.clock()
+        job.task.start(max(start - when, 0), time.time())
+        error = None
+        try:
+            return job.action()
+        except Exception as e:
+            error = e
+            raise e
+        finally:
+            job.task.finish(self.clock() - start, error)
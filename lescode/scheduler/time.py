@@ -1,144 +1,226 @@
+import bisect
+import calendar
+import itertools
 from datetime import datetime, timedelta
-from functools import partial
+from functools import lru_cache
 from typing import *
 from typing import Callable
 
-from dateutil.relativedelta import relativedelta
-
-from ..functional import (case, compose, concat, filter, identity, lt, map,
-                          mock, peek_nth)
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 Range = Tuple[int, int]
 Time = Union[int, Range]
 TimeConf = Union[int, Tuple[Time,...]]
 
+FIELDS = ('year', 'month', 'week', 'weekday', 'day', 'hour', 'minute', 'second', 'microsecond')
+BOUNDS = {
+    'month': (1, 12),
+    'week': (1, 5),
+    'weekday': (1, 7),
+    'day': (1, 31),
+    'hour': (0, 23),
+    'minute': (0, 59),
+    'second': (0, 59),
+    'microsecond': (0, 999999),
+}
+CALENDAR = ('year', 'month', 'week', 'weekday', 'day')
+HORIZON = 400
+
+
+def __values(name:str, conf:TimeConf) -> Set[int]:
+    values = set()
+    for moment in (conf if type(conf) is tuple else (conf,)):
+        values.update(range(*moment) if type(moment) is tuple else (moment,))
+
+    if name in BOUNDS:
+        low, high = BOUNDS[name]
+        for value in values:
+            if not low <= value <= high:
+                raise Exception(f"{name} {value} is out of range [{low}, {high}]")
+
+    return values
+
+
+def __bits(values:Iterable[int]) -> int:
+    bits = 0
+    for value in values:
+        bits |= 1 << value
+    return bits
+
+
+def next_bit(bits:int, value:int) -> Optional[int]:
+    bits >>= value
+    if not bits:
+        return None
+    return value + (bits & -bits).bit_length() - 1
+
+
+def bit_values(bits:int) -> List[int]:
+    values = []
+    while bits:
+        low = bits & -bits
+        values.append(low.bit_length() - 1)
+        bits ^= low
+    return values
+
+
+def next_value(values:Tuple[int, ...], value:int) -> Optional[int]:
+    index = bisect.bisect_left(values, value)
+    if index == len(values):
+        return None
+    return values[index]
+
+
+class Schedule(NamedTuple):
+    years:Optional[Tuple[int, ...]]
+    months:int
+    days:Tuple[int, ...]
+    hours:int
+    minutes:int
+    seconds:int
+    microseconds:Tuple[int, ...]
+
+    def next_after(self, moment:datetime) -> Optional[datetime]:
+        moment += timedelta(microseconds=1)
+        year, month, day, hour, minute, second, microsecond = moment.year, moment.month, moment.day, moment.hour, moment.minute, moment.second, moment.microsecond
+        horizon = self.years[-1] if self.years else year + HORIZON
+
+        while year <= horizon:
+            if self.years:
+                value = next_value(self.years, year)
+                if value is None:
+                    return None
+                if value != year:
+                    year, month, day, hour, minute, second, microsecond = value, 1, 1, 0, 0, 0, 0
+
+            value = next_bit(self.months, month)
+            if value is None:
+                year, month, day, hour, minute, second, microsecond = year + 1, 1, 1, 0, 0, 0, 0
+                continue
+            if value != month:
+                month, day, hour, minute, second, microsecond = value, 1, 0, 0, 0, 0
+
+            first, size = calendar.monthrange(year, month)
+            value = next_bit(self.days[first] & ((2 << size) - 1), day)
+            if value is None:
+                month, day, hour, minute, second, microsecond = month + 1, 1, 0, 0, 0, 0
+                continue
+            if value != day:
+                day, hour, minute, second, microsecond = value, 0, 0, 0, 0
+
+            value = next_bit(self.hours, hour)
+            if value is None:
+                day, hour, minute, second, microsecond = day + 1, 0, 0, 0, 0
+                continue
+            if value != hour:
+                hour, minute, second, microsecond = value, 0, 0, 0
+
+            value = next_bit(self.minutes, minute)
+            if value is None:
+                hour, minute, second, microsecond = hour + 1, 0, 0, 0
+                continue
+            if value != minute:
+                minute, second, microsecond = value, 0, 0
+
+            value = next_bit(self.seconds, second)
+            if value is None:
+                minute, second, microsecond = minute + 1, 0, 0
+                continue
+            if value != second:
+                second, microsecond = value, 0
+
+            value = next_value(self.microseconds, microsecond)
+            if value is None:
+                second, microsecond = second + 1, 0
+                continue
+
+            return datetime(year, month, day, hour, minute, second, value, tzinfo=moment.tzinfo)
+
+        return None
+
+    def occurrences(self, moment:datetime, until:Optional[datetime]=None) -> Iterator[datetime]:
+        times = list(itertools.product(bit_values(self.hours), bit_values(self.minutes), bit_values(self.seconds), self.microseconds))
+        offsets = [timedelta(hours=hour, minutes=minute, seconds=second, microseconds=microsecond) for hour, minute, second, microsecond in times]
+        first = self.next_after(moment)
+
+        while first is not None:
+            midnight = first.replace(hour=0, minute=0, second=0, microsecond=0)
+            start = bisect.bisect_left(times, (first.hour, first.minute, first.second, first.microsecond))
+            stop = len(offsets) if until is None or until >= midnight + offsets[-1] else bisect.bisect_right(offsets, until - midnight)
+            for offset in itertools.islice(offsets, start, stop):
+                yield midnight + offset
+
+            if stop < len(offsets):
+                return
+
+            first = self.next_after(first.replace(hour=23, minute=59, second=59, microsecond=999999))
+
+
+@lru_cache(maxsize=1024)
+def compile_schedule(year:TimeConf=0, month:TimeConf=0, week:TimeConf=0, weekday:TimeConf=0, day:TimeConf=0, hour:Optional[TimeConf]=None, minute:Optional[TimeConf]=None, second:Optional[TimeConf]=None, microsecond:Optional[TimeConf]=None) -> Schedule:
+    timedetail = dict(year=year, month=month, week=week, weekday=weekday, day=day, hour=hour, minute=minute, second=second, microsecond=microsecond)
+    given = {
+        name: __values(name, conf) for name, conf in timedetail.items()
+        if (conf if name in CALENDAR else conf is not None)
+    }
+    lowest = max((FIELDS.index(name) for name in given), default=FIELDS.index('second'))
+
+    def resolve(name:str) -> Optional[Set[int]]:
+        if name in given:
+            return given[name]
+
+        if name in ('week', 'weekday') or FIELDS.index(name) <= lowest:
+            return None
+
+        if name == 'day' and ('week' in given or 'weekday' in given):
+            return None
+
+        return {BOUNDS[name][0]}
+
+    def bits(name:str) -> int:
+        values = resolve(name)
+        low, high = BOUNDS[name]
+        return __bits(range(low, high + 1) if values is None else values)
+
+    week = __bits(day for day in range(1, 32) if (day - 1) // 7 + 1 in (resolve('week') or range(1, 6)))
+    weekdays = resolve('weekday') or range(1, 8)
+    days = tuple(
+        bits('day') & week & __bits(day for day in range(1, 32) if (first + day - 1) % 7 + 1 in weekdays)
+        for first in range(7)
+    )
 
-def __range(moments:Tuple[int, ...]):
-    return lambda _: range(*moments)
+    years = resolve('year') if 'year' in given else None
 
+    return Schedule(
+        years=tuple(sorted(years)) if years else None,
+        months=bits('month'),
+        days=days,
+        hours=bits('hour'),
+        minutes=bits('minute'),
+        seconds=bits('second'),
+        microseconds=tuple(sorted(resolve('microsecond'))),
+    )
 
-def __get_moments(next_run_getter:Callable, pivot:datetime, moments:Tuple[int, ...], multi:bool, **kwargs):
-    return compose(
-        tuple, sorted, concat, map(partial(next_run_getter, pivot, multi=False, **kwargs)), 
-        case(predicate=identity, action=mock(moments), otherwise=__range(moments))
-    )(multi)
 
+def get_next_runtime(now:datetime, **kwargs) -> Optional[datetime]:
+    return compile_schedule(**kwargs).next_after(now)
 
-def __move_by_delta(next_run_getter:Callable, pivot:datetime, delta:timedelta, **kwargs):
-    return compose(tuple, sorted)(
-        next_run + delta if pivot >= next_run else next_run
-        for next_run in next_run_getter(pivot, multi=True, **kwargs)
-    )
 
+def iter_runtimes(now:datetime, count:Optional[int]=None, until:Optional[datetime]=None, **kwargs) -> Iterator[datetime]:
+    return itertools.islice(compile_schedule(**kwargs).occurrences(now, until), count)
 
-def get_next_microsecond(now:datetime, microsecond:TimeConf=0, multi:bool=True, **kwargs) -> Tuple[datetime, ...]:
-    if type(microsecond) is tuple:
-        return __get_moments(get_next_microsecond, now, microsecond, multi, **kwargs)
-    else:
-        next_run = datetime(year=now.year, month=now.month, day=now.day, hour=now.hour, minute=now.minute, second=now.second, microsecond=microsecond)
-        if now > next_run:
-            next_run += relativedelta(seconds=1)
-        return (next_run,)
-
-
-def get_next_second(now:datetime, second:Optional[TimeConf]=None, multi:bool=True, **kwargs) -> Tuple[datetime, ...]:
-    if second is not None:
-        if type(second) is tuple:
-            return __get_moments(get_next_second, now, second, multi, **kwargs)
-        else:
-            pivot = datetime(year=now.year, month=now.month, day=now.day, hour=now.hour, minute=now.minute, second=second)
-            return __move_by_delta(get_next_microsecond, pivot, relativedelta(minutes=1), **kwargs)
-
-    return get_next_microsecond(now, multi=True, **kwargs)
-
-
-def get_next_minute(now:datetime, minute:Optional[TimeConf]=None, multi:bool=True, **kwargs) -> datetime:
-    if minute is not None:
-        if type(minute) is tuple:
-            return __get_moments(get_next_minute, now, minute, multi, **kwargs)
-        else:
-            pivot = datetime(year=now.year, month=now.month, day=now.day, hour=now.hour, minute=minute)
-            return __move_by_delta(get_next_second, pivot, relativedelta(hours=1), **kwargs)
-    return get_next_second(now, multi=True, **kwargs)
-
-
-def get_next_hour(now:datetime, hour:Optional[TimeConf]=None, multi:bool=True, **kwargs) -> datetime:
-    if hour is not None:
-        if type(hour) is tuple:
-            return __get_moments(get_next_hour, now, hour, multi, **kwargs)
-        else:
-            pivot = datetime(year=now.year, month=now.month, day=now.day, hour=hour)
-            return __move_by_delta(get_next_minute, pivot, relativedelta(days=1), **kwargs)
-    return get_next_minute(now, multi=True, **kwargs)
-
-
-def get_next_day(now:datetime, day:TimeConf=0, multi:bool=True, **kwargs) -> datetime:
-    if day:
-        if type(day) is tuple:
-            return __get_moments(get_next_day, now, day, multi, **kwargs)
-        else:
-            pivot = datetime(year=now.year, month=now.month, day=day)
-            return __move_by_delta(get_next_hour, pivot, relativedelta(months=1), **kwargs)
-    return get_next_hour(now, multi=True, **kwargs)
-
-
-def get_next_weekday(now:datetime, weekday:TimeConf=0, multi:bool=True, **kwargs) -> datetime:
-    if weekday:
-        if type(weekday) is tuple:
-            return __get_moments(get_next_weekday, now, weekday, multi, **kwargs)
-        else:
-            weekday = max(weekday - 1, 0)
-            pivot = datetime(year=now.year, month=now.month, day=now.day)
-            if pivot.weekday() < weekday:
-                pivot += relativedelta(days=weekday - pivot.weekday())
-            
-            if pivot.weekday() > weekday:
-                pivot += relativedelta(days=7 + weekday - pivot.weekday())
-    
-            return __move_by_delta(get_next_hour, pivot, relativedelta(days=7), **kwargs)
-    return get_next_day(now, multi=True, **kwargs)
-
-
-def get_next_week(now:datetime, week:TimeConf=0, multi:bool=True, **kwargs) -> datetime:
-    if week:
-        if type(week) is tuple:
-            return __get_moments(get_next_week, now, week, multi, **kwargs)
-        else:
-            pivot = datetime(year=now.year, month=now.month, day=1) + relativedelta(weeks=week - 1)
-            next_runs = get_next_weekday(pivot, multi=True, **kwargs)
-            for i, next_run in enumerate(next_runs):
-                if next_run <= now:
-                    if now.month < 12:
-                        pivot = datetime(year=now.year, month=now.month + 1, day=1)
-                    else:
-                        pivot = datetime(year=now.year + 1, month=1, day=1)
-                    pivot += relativedelta(weeks=week - 1)
-                    next_runs[i] = get_next_weekday(pivot, multi=True, **kwargs)
-
-            return compose(tuple, sorted)(next_runs)
-
-    return get_next_weekday(now, multi=True, **kwargs)
-
-
-def get_next_month(now:datetime, month:TimeConf=0, multi:bool=True, **kwargs) -> datetime:
-    if month:
-        if type(month) is tuple:
-            return __get_moments(get_next_month, now, month, multi, **kwargs)
-        else:
-            pivot = datetime(year=now.year + (1 if now.month > month else 0), month=month, day=1)
-            return __move_by_delta(get_next_week, pivot, relativedelta(years=1), **kwargs)
-    return get_next_week(now, multi=True, **kwargs)
-
-
-def get_next_year(now:datetime, year:int=0, multi:bool=True, **kwargs) -> Optional[datetime]:
-    if year:
-        if type(year) is tuple:
-            return __get_moments(get_next_year, now, year, multi, **kwargs)
-        else:
-            pivot = datetime(year=year, month=1, day=1)
-            return compose(tuple, filter(lt(now)), __move_by_delta)(get_next_month, pivot, relativedelta(), **kwargs)
-    return get_next_month(now, multi=True, **kwargs)
 
+def get_next_runtimes(now:datetime, count:Optional[int]=None, until:Optional[datetime]=None, array:bool=False, **kwargs) -> Union[List[datetime], 'numpy.ndarray']:
+    if count is None and until is None and compile_schedule(**kwargs).years is None:
+        raise Exception("count or until is required for an unbounded schedule")
 
-def get_next_runtime(now:datetime, **kwargs) -> Optional[datetime]:
-    return compose(peek_nth(0), get_next_year)(now, **kwargs)
+    runtimes = iter_runtimes(now, count, until, **kwargs)
+    if not array:
+        return list(runtimes)
+
+    if numpy is None:
+        raise Exception("numpy is required for array output")
+    return numpy.array([runtime.replace(tzinfo=None) for runtime in runtimes], dtype='datetime64[us]')
@@ -1,17 +1,106 @@
+import bisect
+from abc import ABC, abstractmethod
+from collections import deque
 from typing import *
 from typing import Callable
 
 
+BUCKETS = (0.001, 0.01, 0.1, 1, 10, 60, float('inf'))
+
+
+class TaskInfo(NamedTuple):
+    name:Optional[str]
+    state:str
+    runs:int
+    failures:int
+    skips:int
+    running:int
+    lag:float
+    max_lag:float
+    duration:float
+    p50:float
+    p90:float
+    p99:float
+    histogram:Dict[float, int]
+    last_run:Optional[float]
+    exception:Optional[BaseException]
+
+
+class SchedulerInfo(NamedTuple):
+    pending:int
+    running:int
+    tasks:List[TaskInfo]
+
+
 class Task:
 
-    def __init__(self):
+    def __init__(self, name:Optional[str]=None, window:int=1024):
+        self.name:Optional[str] = name
         self.state:str = 'idle'
         self.handle:Optional[asyncio.Handle] = None
+        self.runs:int = 0
+        self.failures:int = 0
+        self.skips:int = 0
+        self.running:int = 0
+        self.lag:float = 0
+        self.max_lag:float = 0
+        self.duration:float = 0
+        self.histogram:List[int] = [0] * len(BUCKETS)
+        self.samples:Deque[float] = deque(maxlen=window)
+        self.last_run:Optional[float] = None
+        self.exception:Optional[BaseException] = None
 
     def cancel(self, *args, **kwargs):
+        self.state = "canceled"
         if self.handle:
             self.handle.cancel()
-        self.state = "canceled"
 
     def set_state(self, state:str, *args, **kwargs):
         self.state = state
+
+    def start(self, lag:float, timestamp:float):
+        self.running += 1
+        self.lag += lag
+        self.max_lag = max(self.max_lag, lag)
+        self.last_run = timestamp
+
+    def finish(self, duration:float, exception:Optional[BaseException]=None):
+        self.running -= 1
+        self.runs += 1
+        self.duration += duration
+        self.histogram[bisect.bisect_left(BUCKETS, duration)] += 1
+        self.samples.append(duration)
+        if exception is not None:
+            self.failures += 1
+            self.exception = exception
+
+    def percentile(self, samples:List[float], rank:float) -> float:
+        if not samples:
+            return 0
+        return samples[min(len(samples) - 1, int(rank * len(samples)))]
+
+    def info(self) -> TaskInfo:
+        samples = sorted(self.samples)
+        started = self.runs + self.running
+        return TaskInfo(
+            name=self.name, state=self.state, runs=self.runs, failures=self.failures, skips=self.skips, running=self.running,
+            lag=self.lag / started if started else 0, max_lag=self.max_lag,
+            duration=self.duration / self.runs if self.runs else 0,
+            p50=self.percentile(samples, 0.5), p90=self.percentile(samples, 0.9), p99=self.percentile(samples, 0.99),
+            histogram=dict(zip(BUCKETS, self.histogram)), last_run=self.last_run, exception=self.exception
+        )
+
+
+class JobStore(ABC):
+
+    @abstractmethod
+    def acquire(self, name:str, owner:str, lease:float, now:float) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    def release(self, name:str, owner:str):
+        raise NotImplementedError
+
+    @abstractmethod
+    def owner(self, name:str, now:float) -> Optional[str]:
+        raise NotImplementedError
@@ -30,5 +30,9 @@ setuptools.setup(
         'python-dateutil',
         'pyyaml',
         'toolz'
-    ]
+    ],
+    extras_require={
+        'numpy': ['numpy'],
+        'orjson': ['orjson']
+    }
 )
\ No newline at end of file